@@ -1,6 +1,12 @@
 import sqlite3
 from flask import Blueprint, render_template, request, redirect, url_for, flash, g, make_response, jsonify
-from werkzeug.security import generate_password_hash
+from password_policy import hash_password
+from user_cache import invalidate_user_profiles
+from fragment_cache import LazyValue
+from data_versions import check_not_modified, ensure_sqlite_data_versions, get_sqlite_data_versions, with_validators
+from issues_api import encode_cursor, parse_bulk_action, parse_fields, parse_issue_filters, serialize_issue
+from issue_search import ensure_sqlite_issue_search, search_sqlite_issues
+from event_stream import event_stream_response, sqlite_issue_poller
 import json
 import csv
 from io import StringIO
@@ -14,6 +20,26 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row
     return conn
 
+_data_versions_ready = False
+
+def get_data_versions(conn, *collections):
+    """Get data versions, creating the version table and triggers on first use."""
+    global _data_versions_ready
+    if not _data_versions_ready:
+        ensure_sqlite_data_versions(conn)
+        _data_versions_ready = True
+    return get_sqlite_data_versions(conn, *collections)
+
+_issue_search_ready = False
+
+def search_issues_db(conn, query, **options):
+    """Search issues, creating the FTS index and its triggers on first use."""
+    global _issue_search_ready
+    if not _issue_search_ready:
+        ensure_sqlite_issue_search(conn)
+        _issue_search_ready = True
+    return search_sqlite_issues(conn, query, **options)
+
 def log_admin_activity(admin_id, action, target_type=None, target_id=None, details=None):
     """Log admin activity for tracking purposes."""
     try:
@@ -41,35 +67,42 @@ def get_system_setting(key, default=None):
 def admin_dashboard():
     from app import parse_datetime
     conn = get_db_connection()
+
+    versions = get_data_versions(conn, 'issues', 'users', 'admin_logs', 'system_notifications')
+    not_modified = check_not_modified(versions, g.user['id'] if g.user else None)
+    if not_modified:
+        conn.close()
+        return not_modified
     
+    # Only shown inside cached fragments, so these queries run on a cache miss
     # Get issues with student information
-    issues = conn.execute('''
+    issues = LazyValue(lambda: conn.execute('''
         SELECT issues.*, users.full_name, users.index_number, users.email 
         FROM issues 
         JOIN users ON issues.student_id = users.id 
         ORDER BY issues.created_at DESC
         LIMIT 10
-    ''').fetchall()
+    ''').fetchall())
     
     # Get comprehensive statistics
-    stats = conn.execute('''
+    stats = LazyValue(lambda: conn.execute('''
         SELECT 
             COUNT(*) as total,
             SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
             SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
             SUM(CASE WHEN status = 'resolved' THEN 1 ELSE 0 END) as resolved
         FROM issues
-    ''').fetchone()
+    ''').fetchone())
     
     # Get user statistics
-    user_stats = conn.execute('''
+    user_stats = LazyValue(lambda: conn.execute('''
         SELECT 
             COUNT(*) as total_users,
             SUM(CASE WHEN role = 'student' THEN 1 ELSE 0 END) as students,
             SUM(CASE WHEN role = 'admin' THEN 1 ELSE 0 END) as admins,
             SUM(CASE WHEN is_verified = 1 THEN 1 ELSE 0 END) as verified_users
         FROM users
-    ''').fetchone()
+    ''').fetchone())
     
     # Get category statistics
     category_stats = conn.execute('''
@@ -119,25 +152,24 @@ def admin_dashboard():
     ''').fetchall()
     
     # Get recent admin activities
-    recent_activities = conn.execute('''
+    recent_activities = LazyValue(lambda: conn.execute('''
         SELECT al.*, u.full_name as admin_name
         FROM admin_logs al
         JOIN users u ON al.admin_id = u.id
         ORDER BY al.created_at DESC
         LIMIT 10
-    ''').fetchall()
+    ''').fetchall())
     
     # Get system notifications
-    notifications = conn.execute('''
+    notifications = LazyValue(lambda: conn.execute('''
         SELECT * FROM system_notifications
         WHERE is_read = 0
         ORDER BY created_at DESC
         LIMIT 5
-    ''').fetchall()
-    
-    conn.close()
+    ''').fetchall())
     
-    return render_template('admin_dashboard.html', 
+    html = render_template('admin_dashboard.html',
+                         versions=versions,
                          issues=issues, 
                          stats=stats,
                          user_stats=user_stats,
@@ -148,6 +180,8 @@ def admin_dashboard():
                          recent_activities=recent_activities,
                          notifications=notifications,
                          parse_datetime=parse_datetime)
+    conn.close()
+    return with_validators(html)
 
 @admin_bp.route('/admin/create-subadmin', methods=['GET', 'POST'])
 def create_subadmin():
@@ -193,7 +227,7 @@ def create_subadmin():
             conn.close()
             return render_template('create_subadmin.html')
         
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
         
         conn.execute(
             'INSERT INTO users (username, email, full_name, index_number, level, gender, password, role, is_verified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
@@ -256,6 +290,7 @@ def toggle_subadmin(subadmin_id):
         new_status = not subadmin['is_active']
         conn.execute('UPDATE users SET is_active = ? WHERE id = ?', (new_status, subadmin_id))
         conn.commit()
+        invalidate_user_profiles()
         
         action = 'activate' if new_status else 'deactivate'
         log_admin_activity(g.user['id'], f'{action}_subadmin', 'user', subadmin_id, f'{action.title()}d subadmin {subadmin["username"]}')
@@ -283,6 +318,7 @@ def delete_subadmin(subadmin_id):
         # Delete the subadmin
         conn.execute('DELETE FROM users WHERE id = ? AND role = "subadmin"', (subadmin_id,))
         conn.commit()
+        invalidate_user_profiles()
         
         log_admin_activity(g.user['id'], 'delete_subadmin', 'user', subadmin_id, f'Deleted subadmin {subadmin["username"]}')
         
@@ -301,9 +337,11 @@ def subadmin_dashboard():
         return redirect(url_for('login'))
     
     conn = get_db_connection()
+    versions = get_data_versions(conn, 'issues')
     
+    # Only shown inside cached fragments, so these queries run on a cache miss
     # Get student issues statistics only
-    stats = conn.execute('''
+    stats = LazyValue(lambda: conn.execute('''
         SELECT 
             COUNT(*) as total_issues,
             SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
@@ -312,34 +350,113 @@ def subadmin_dashboard():
         FROM issues
         JOIN users ON issues.student_id = users.id
         WHERE users.role = 'student'
-    ''').fetchone()
-    
-    # Get recent student issues
-    recent_issues = conn.execute('''
-        SELECT i.*, u.full_name, u.email, u.index_number
-        FROM issues i
-        JOIN users u ON i.student_id = u.id
-        WHERE u.role = 'student'
-        ORDER BY i.created_at DESC
-        LIMIT 10
-    ''').fetchall()
+    ''').fetchone())
     
     # Get category statistics for students only
-    category_stats = conn.execute('''
+    category_stats = LazyValue(lambda: conn.execute('''
         SELECT i.category, COUNT(*) as count
         FROM issues i
         JOIN users u ON i.student_id = u.id
         WHERE u.role = 'student'
         GROUP BY i.category
         ORDER BY count DESC
-    ''').fetchall()
-    
-    conn.close()
+    ''').fetchall())
     
-    return render_template('subadmin_dashboard.html',
+    # Issue tables are fetched page by page from /api/issues
+    html = render_template('subadmin_dashboard.html',
+                         versions=versions,
                          stats=stats,
-                         recent_issues=recent_issues,
                          category_stats=category_stats)
+    conn.close()
+    return html
+
+@admin_bp.route('/api/issues')
+def api_issues():
+    """Paginated, filtered issue list for the dashboard tables."""
+    if g.user is None or g.user['role'] not in ['subadmin', 'supa_admin']:
+        return jsonify({'error': 'Access denied'}), 403
+
+    try:
+        filters = parse_issue_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    fields = parse_fields(request.args.get('fields'))
+
+    conditions = []
+    params = []
+    if filters['status']:
+        conditions.append('i.status = ?')
+        params.append(filters['status'])
+    if filters['category']:
+        conditions.append('i.category = ?')
+        params.append(filters['category'])
+    if filters['date_from']:
+        conditions.append('i.created_at >= ?')
+        params.append(filters['date_from'])
+    if filters['date_to']:
+        conditions.append('i.created_at < ?')
+        params.append(filters['date_to'])
+    if filters['student']:
+        conditions.append('(u.email = ? OR u.index_number = ? OR CAST(i.student_id AS TEXT) = ?)')
+        params += [filters['student'].lower(), filters['student'].upper(), filters['student']]
+    if filters['cursor']:
+        # Keyset pagination: continue strictly after the last row sent
+        conditions.append('(i.created_at < ? OR (i.created_at = ? AND i.id < ?))')
+        created_at, issue_id = filters['cursor']
+        params += [created_at, created_at, issue_id]
+
+    where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+
+    conn = get_db_connection()
+    rows = conn.execute(f'''
+        SELECT i.id, i.subject AS title, i.message AS description, i.category, i.status,
+               i.created_at, i.updated_at, i.response AS admin_response, i.student_id AS user_id,
+               u.full_name, u.email, u.index_number
+        FROM issues i
+        JOIN users u ON i.student_id = u.id
+        {where}
+        ORDER BY i.created_at DESC, i.id DESC
+        LIMIT ?
+    ''', params + [filters['limit'] + 1]).fetchall()
+    conn.close()
+
+    issues = [dict(row) for row in rows]
+    next_cursor = None
+    if len(issues) > filters['limit']:
+        issues = issues[:filters['limit']]
+        next_cursor = (issues[-1]['created_at'], issues[-1]['id'])
+
+    return jsonify({
+        'issues': [serialize_issue(issue, fields) for issue in issues],
+        'next_cursor': encode_cursor(next_cursor)
+    })
+
+@admin_bp.route('/admin/events')
+def issue_events():
+    """Server-sent issue events, recorded by triggers whichever app writes the issue."""
+    if g.user is None or g.user['role'] not in ['admin', 'subadmin', 'supa_admin']:
+        return jsonify({'error': 'Access denied'}), 403
+    return event_stream_response(lambda broker: sqlite_issue_poller(broker, get_db_connection))
+
+@admin_bp.route('/admin/search')
+def search_issues():
+    """Ranked full-text search over issue subjects, messages and responses."""
+    if g.user is None or g.user['role'] not in ['subadmin', 'supa_admin']:
+        return jsonify({'error': 'Access denied'}), 403
+
+    conn = get_db_connection()
+    try:
+        results = search_issues_db(conn, request.args.get('q', ''),
+                                   page=request.args.get('page', 1, type=int),
+                                   per_page=request.args.get('per_page', 20, type=int),
+                                   status=request.args.get('status') or None,
+                                   category=request.args.get('category') or None)
+    except sqlite3.Error as e:
+        print(f"Error searching issues: {e}")
+        return jsonify({'error': 'Search is unavailable'}), 503
+    finally:
+        conn.close()
+    return jsonify(results)
 
 @admin_bp.route('/admin/manage-categories')
 def manage_categories():
@@ -479,6 +596,76 @@ def admin_delete_issue(issue_id):
     flash('Issue deleted successfully.', 'success')
     return redirect(url_for('admin.admin_dashboard'))
 
+# Roles issues can be assigned to
+ASSIGNEE_ROLES = ('subadmin', 'admin', 'supa_admin')
+
+@admin_bp.route('/admin/assignees')
+def assignees():
+    """Staff that issues can be assigned to, for the bulk action menu."""
+    if g.user is None or g.user['role'] not in ['admin', 'subadmin', 'supa_admin']:
+        return jsonify({'error': 'Access denied'}), 403
+
+    conn = get_db_connection()
+    placeholders = ', '.join('?' for _ in ASSIGNEE_ROLES)
+    rows = conn.execute(f'''
+        SELECT id, full_name, username FROM users
+        WHERE role IN ({placeholders}) AND is_active = 1
+        ORDER BY full_name
+    ''', ASSIGNEE_ROLES).fetchall()
+    conn.close()
+    return jsonify({'assignees': [{'id': row['id'], 'name': row['full_name'] or row['username']} for row in rows]})
+
+@admin_bp.route('/admin/issues/bulk', methods=['POST'])
+def bulk_issue_action():
+    """Change the status, response or assignee of many issues, or delete them, in one transaction."""
+    if g.user is None or g.user['role'] not in ['admin', 'subadmin', 'supa_admin']:
+        return jsonify({'error': 'Access denied'}), 403
+
+    try:
+        bulk = parse_bulk_action(request.get_json(silent=True) or request.form)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not all(issue_id.isdigit() for issue_id in bulk['ids']):
+        return jsonify({'error': 'Issue ids must be numbers'}), 400
+    ids = [int(issue_id) for issue_id in bulk['ids']]
+    if bulk['action'] == 'delete' and g.user['role'] not in ['admin', 'supa_admin']:
+        return jsonify({'error': 'Only admins can delete issues'}), 403
+
+    conn = get_db_connection()
+    try:
+        placeholders = ', '.join('?' for _ in ids)
+        found = {row['id'] for row in conn.execute(f'SELECT id FROM issues WHERE id IN ({placeholders})', ids)}
+        updated = [issue_id for issue_id in ids if issue_id in found]
+        missing = [issue_id for issue_id in ids if issue_id not in found]
+
+        if bulk['action'] == 'assign' and bulk['assignee']:
+            assignee = conn.execute('SELECT id, role FROM users WHERE id = ?', (bulk['assignee'],)).fetchone()
+            if assignee is None or assignee['role'] not in ASSIGNEE_ROLES:
+                return jsonify({'error': 'Issues can only be assigned to sub-admins and admins'}), 400
+
+        # Triggers keep the data versions, search index and live events in step
+        with conn:
+            if bulk['action'] == 'delete':
+                conn.executemany('DELETE FROM issues WHERE id = ?', [(issue_id,) for issue_id in updated])
+            elif bulk['action'] == 'status':
+                conn.executemany('''
+                    UPDATE issues SET status = ?, response = COALESCE(?, response), updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', [(bulk['status'], bulk['response'], issue_id) for issue_id in updated])
+            elif bulk['action'] == 'respond':
+                conn.executemany('UPDATE issues SET response = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                                 [(bulk['response'], issue_id) for issue_id in updated])
+            else:
+                conn.executemany('UPDATE issues SET assigned_to = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                                 [(bulk['assignee'], issue_id) for issue_id in updated])
+    finally:
+        conn.close()
+
+    if updated:
+        log_admin_activity(g.user['id'], f"bulk_{bulk['action']}_issues", 'issues', None,
+                           f"{bulk['action']} on {len(updated)} issue(s): {', '.join(map(str, updated[:20]))}")
+    return jsonify({'action': bulk['action'], 'updated': updated, 'missing': missing})
+
 @admin_bp.route('/admin/export-data')
 def export_data():
     if g.user is None or g.user['role'] not in ['admin', 'supa_admin']:
@@ -582,7 +769,7 @@ def update_password():
         flash('Passwords do not match.', 'danger')
         return redirect(url_for('admin.admin_settings'))
     
-    password_hash = generate_password_hash(password)
+    password_hash = hash_password(password)
     
     conn = get_db_connection()
     conn.execute('UPDATE users SET password = ? WHERE username = ?', (password_hash, g.user['username']))
@@ -803,6 +990,12 @@ def chart_data(chart_type):
         return jsonify({'error': 'Access denied'}), 403
     
     conn = get_db_connection()
+
+    # Charts depend only on issues; the chart type is part of the request path
+    not_modified = check_not_modified(get_data_versions(conn, 'issues'))
+    if not_modified:
+        conn.close()
+        return not_modified
     
     if chart_type == 'issues_by_month':
         data = conn.execute('''
@@ -849,4 +1042,4 @@ def chart_data(chart_type):
     
     # Convert to JSON-serializable format
     result = [dict(row) for row in data]
-    return jsonify(result)
+    return with_validators(jsonify(result))
@@ -1,5 +1,5 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import check_password_hash, generate_password_hash
+from password_policy import hash_password, verify_password
 from datetime import datetime
 import os
 
@@ -7,10 +7,14 @@ import os
 import firebase_admin
 from firebase_admin import credentials, auth, db
 from firebase_config import RealtimeDB, initialize_firebase
+from static_assets import init_static_assets
+from fragment_cache import init_fragment_cache
 import json
 
 app = Flask(__name__)
 app.secret_key = "student-report-system-firebase-secret-key"
+init_static_assets(app)
+init_fragment_cache(app)
 
 # Initialize Firebase and Database
 initialize_firebase()
@@ -24,7 +28,7 @@ def init_default_users():
         if not admin_user:
             admin_data = {
                 'email': 'admin@ktu.edu.gh',
-                'password': generate_password_hash('admin123'),
+                'password': hash_password('admin123'),
                 'full_name': 'Super Admin',
                 'role': 'supa_admin',
                 'is_verified': True,
@@ -38,7 +42,7 @@ def init_default_users():
         if not subadmin_user:
             subadmin_data = {
                 'email': 'subadmin@ktu.edu.gh',
-                'password': generate_password_hash('subadmin123'),
+                'password': hash_password('subadmin123'),
                 'full_name': 'Sub Admin',
                 'role': 'subadmin',
                 'is_verified': True,
@@ -52,7 +56,7 @@ def init_default_users():
         if not student_user:
             student_data = {
                 'email': 'student@ktu.edu.gh',
-                'password': generate_password_hash('student123'),
+                'password': hash_password('student123'),
                 'full_name': 'Test Student',
                 'role': 'student',
                 'is_verified': True,
@@ -76,7 +80,12 @@ def login():
 
         user = firebase_db.get_user_by_email(email)
 
-        if user and check_password_hash(user['password'], password):
+        valid, upgraded_hash = verify_password(user['password'], password) if user else (False, None)
+
+        if valid:
+            if upgraded_hash:
+                firebase_db.update_user(user['id'], {'password': upgraded_hash})
+
             session['user_id'] = user['id']
             session['user_email'] = user['email']
             session['user_role'] = user['role']
@@ -114,7 +123,7 @@ def register():
 
         user_data = {
             'email': email,
-            'password': generate_password_hash(password),
+            'password': hash_password(password),
             'full_name': full_name,
             'role': 'student',
             'is_verified': True,
@@ -270,7 +279,7 @@ def create_subadmin():
 
         user_data = {
             'email': email,
-            'password': generate_password_hash(password),
+            'password': hash_password(password),
             'full_name': full_name,
             'role': 'subadmin',
             'is_verified': True,
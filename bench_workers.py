@@ -0,0 +1,140 @@
+"""Compare gunicorn worker classes on I/O-bound requests.
+
+Starts gunicorn with gunicorn.conf.py once per worker class, serving a
+small app whose view waits like a chain of RTDB reads, and drives it
+with N concurrent clients:
+
+    python bench_workers.py --classes sync gthread gevent --users 100 1000
+
+The wait is simulated with time.sleep, which gthread releases and gevent
+patches, exactly like a socket read. So the numbers show what the worker
+model does to an RTDB-bound view, not how fast Firebase itself is. Point
+--url at a running deployment to load a real endpoint instead.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from flask import Flask, jsonify, request
+
+bench_app = Flask(__name__)
+
+@bench_app.route('/bench/io')
+def simulated_io():
+    """Wait like a view that makes `reads` sequential RTDB calls of `ms` each"""
+    reads = request.args.get('reads', 3, type=int)
+    ms = request.args.get('ms', 40, type=int)
+    for _ in range(reads):
+        time.sleep(ms / 1000)
+    return jsonify({'reads': reads, 'ms': ms})
+
+async def fetch(host, port, path, timeout):
+    """Make one HTTP/1.1 request on a fresh connection; returns the status code"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+async def run_load(url, users, seconds, timeout):
+    """Run `users` clients in a closed loop for `seconds`; returns a result dict"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def user():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await fetch(host, port, path, timeout)
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                errors += 1
+                await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+
+    return {
+        'users': users,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'errors': errors
+    }
+
+def wait_for_port(host, port, seconds=20):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def start_server(worker_class, port, workers):
+    """Start gunicorn with the project config and the given worker class"""
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class, WEB_CONCURRENCY=str(workers))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+         '--access-logfile', '/dev/null', '--backlog', '4096', 'bench_workers:bench_app'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_port('127.0.0.1', port):
+        process.terminate()
+        raise SystemExit(f'gunicorn ({worker_class}) did not start')
+    return process
+
+def print_result(label, result):
+    print(f"{label:<10} {result['users']:>6} users  {result['requests_per_second']:8.1f} req/s  "
+          f"p50 {result['p50_ms']:7.0f} ms  p95 {result['p95_ms']:7.0f} ms  errors {result['errors']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark gunicorn worker classes on I/O-bound requests')
+    parser.add_argument('--classes', nargs='+', default=['sync', 'gthread', 'gevent'])
+    parser.add_argument('--users', nargs='+', type=int, default=[100, 1000])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--timeout', type=float, default=30, help='per-request client timeout')
+    parser.add_argument('--reads', type=int, default=3, help='simulated RTDB reads per request')
+    parser.add_argument('--ms', type=int, default=40, help='simulated latency of each read')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--url', help='load this URL on a running server instead of starting gunicorn')
+    args = parser.parse_args()
+
+    if args.url:
+        for users in args.users:
+            print_result('target', asyncio.run(run_load(args.url, users, args.seconds, args.timeout)))
+        raise SystemExit
+
+    print(f"{args.workers} workers, {args.reads} simulated reads of {args.ms} ms per request")
+    for worker_class in args.classes:
+        server = start_server(worker_class, args.port, args.workers)
+        try:
+            url = f'http://127.0.0.1:{args.port}/bench/io?reads={args.reads}&ms={args.ms}'
+            for users in args.users:
+                print_result(worker_class, asyncio.run(run_load(url, users, args.seconds, args.timeout)))
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,151 @@
+import gzip
+import os
+import random
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this gain less than the headers and CPU cost
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'
+)
+
+def choose_encoding(accept_encodings):
+    """Pick the best encoding the client accepts: br if available, then gzip"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress_body(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+def _gzip_stream(chunks):
+    """Compress a streamed body chunk by chunk, flushing so each chunk is sent at once"""
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _is_compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers or 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    return response.mimetype in COMPRESSIBLE_TYPES
+
+def _weaken_etag(response):
+    # A compressed body is a different byte sequence, so a strong ETag can't
+    # be shared with the identity encoding; If-None-Match compares weakly
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+def compress_response(response):
+    """after_request hook that gzip/brotli-encodes large text responses"""
+    if not _is_compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # Keep streams streaming; gzip can flush per chunk, brotli here can't
+        if response.direct_passthrough or response.mimetype == 'text/event-stream':
+            return response
+        response.response = _gzip_stream(response.response)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers.pop('Content-Length', None)
+        _weaken_etag(response)
+        return response
+
+    if response.direct_passthrough:
+        # send_file responses (static files) are left to the web server
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    compressed = compress_body(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    _weaken_etag(response)
+    return response
+
+def init_compression(app):
+    """Compress responses of app when the client accepts it"""
+    app.after_request(compress_response)
+    return app
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    from datetime import datetime, timedelta
+    from flask import Flask, render_template_string
+
+    parser = argparse.ArgumentParser(description='Measure compression of a dashboard-like issue table')
+    parser.add_argument('--issues', type=int, default=10000)
+    args = parser.parse_args()
+
+    # The same row markup the issue tables render, with varied synthetic data
+    row = '''<tr>
+        <td><div><strong>{{ i.full_name }}</strong><br><small class="text-muted">{{ i.index_number }}</small></div></td>
+        <td>{{ i.title }}</td>
+        <td><span class="badge bg-secondary">{{ i.category }}</span></td>
+        <td><span class="badge bg-warning">{{ i.status }}</span></td>
+        <td>{{ i.created_at }}</td>
+        <td><button class="btn btn-sm btn-outline-primary" onclick="viewIssue('{{ i.id }}')"><i class="fas fa-eye"></i></button></td>
+    </tr>'''
+    page = '<table class="table table-hover"><tbody>{% for i in issues %}' + row + '{% endfor %}</tbody></table>'
+    rng = random.Random(42)
+    categories = ['Academic', 'Facilities', 'Hostel', 'Library', 'ICT', 'Finance']
+    statuses = ['pending', 'in_progress', 'resolved']
+    first_names = 'Kwame Ama Kofi Akua Yaw Abena Kojo Efua Kwesi Adwoa Fiifi Esi Nana Afia Selorm Delali'.split()
+    last_names = 'Mensah Owusu Boateng Asante Addo Appiah Osei Darko Agyeman Tetteh Quaye Amoah Nyarko'.split()
+    words = ('projector lecture hall wifi exam timetable results portal fees hostel water light '
+             'registration course clash missing grade library printer access card refund lab '
+             'computer network slow broken toilet bus schedule transcript').split()
+    start = datetime(2025, 1, 1)
+    issues = [{
+        'id': ''.join(rng.choice('-_0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
+                      for _ in range(20)),
+        'full_name': f'{rng.choice(first_names)} {rng.choice(last_names)}',
+        'index_number': f'B{rng.randint(202000000, 202499999)}',
+        'title': ' '.join(rng.choice(words) for _ in range(rng.randint(3, 8))).capitalize(),
+        'category': rng.choice(categories),
+        'status': rng.choice(statuses),
+        'created_at': (start + timedelta(seconds=rng.randint(0, 30000000))).isoformat()
+    } for _ in range(args.issues)]
+
+    with Flask(__name__).app_context():
+        body = render_template_string(page, issues=issues).encode('utf-8')
+
+    print(f"{args.issues} issue rows: {len(body) / 1024:.0f} KB uncompressed")
+    encodings = ['gzip'] + (['br'] if brotli is not None else [])
+    for encoding in encodings:
+        started = time.perf_counter()
+        compressed = compress_body(body, encoding)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{encoding:<5} {len(compressed) / 1024:8.0f} KB  saved {100 - len(compressed) * 100 / len(body):.1f}%  "
+              f"({elapsed:.0f} ms to compress)")
@@ -0,0 +1,112 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from flask import g, make_response, request, session
+
+# Collections whose writes bump a version; pages built from them are
+# revalidated against these versions instead of being rebuilt.
+VERSIONED_COLLECTIONS = ('issues', 'users', 'categories')
+
+# The SQLite admin dashboard also shows activity logs and notifications
+SQLITE_VERSIONED_TABLES = VERSIONED_COLLECTIONS + ('admin_logs', 'system_notifications')
+
+def firebase_version_bump(collection):
+    """Return multi-path update entries that bump collection's version.
+
+    Both values are resolved by the server, so concurrent writers never collide.
+    """
+    return {
+        f'data_versions/{collection}/version': {'.sv': {'increment': 1}},
+        f'data_versions/{collection}/updated_at': {'.sv': 'timestamp'}
+    }
+
+def ensure_sqlite_data_versions(conn):
+    """Create the data_versions table and the triggers that bump it on writes"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            collection TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for collection in SQLITE_VERSIONED_TABLES:
+        if collection not in existing:
+            continue
+        conn.execute('INSERT OR IGNORE INTO data_versions (collection, version, updated_at) VALUES (?, 0, 0)',
+                     (collection,))
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS bump_{collection}_version_on_{operation.lower()}
+                AFTER {operation} ON {collection}
+                BEGIN
+                    UPDATE data_versions
+                    SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+                    WHERE collection = '{collection}';
+                END
+            ''')
+    conn.commit()
+
+def get_sqlite_data_versions(conn, *collections):
+    """Return {collection: {'version', 'updated_at'}} from SQLite, times in ms like Firebase"""
+    placeholders = ', '.join('?' for _ in collections)
+    rows = conn.execute(f'SELECT collection, version, updated_at FROM data_versions WHERE collection IN ({placeholders})',
+                        collections).fetchall()
+    return {row['collection']: {'version': row['version'], 'updated_at': row['updated_at'] * 1000} for row in rows}
+
+_build_id = None
+
+def build_id():
+    """Identify the deployed templates so a deploy invalidates old ETags"""
+    global _build_id
+    if _build_id is None:
+        _build_id = os.environ.get('APP_BUILD_ID')
+        if not _build_id:
+            template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+            stamp = hashlib.sha1()
+            for name in sorted(os.listdir(template_dir)):
+                stamp.update(f'{name}:{os.stat(os.path.join(template_dir, name)).st_mtime_ns};'.encode())
+            _build_id = stamp.hexdigest()[:12]
+    return _build_id
+
+def check_not_modified(versions, *vary):
+    """Return a 304 response if the client already has this version, else None.
+
+    versions maps collection names to {'version', 'updated_at'} as returned by
+    RealtimeDB.get_data_versions or get_sqlite_data_versions. vary lists
+    anything else the response depends on, such as the viewer's id and role.
+    Call with_validators on the full response afterwards.
+    """
+    # Pending flash messages are rendered into the page, so never skip it
+    if session.get('_flashes'):
+        g.validators = None
+        return None
+
+    parts = [build_id(), request.path]
+    parts += [f"{name}:{versions.get(name, {}).get('version', 0)}" for name in sorted(versions)]
+    parts += [str(part) for part in vary]
+    etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    updated = [v.get('updated_at') or 0 for v in versions.values()]
+    last_modified = datetime.fromtimestamp(max(updated, default=0) / 1000, tz=timezone.utc) if any(updated) else None
+
+    g.validators = (etag, last_modified)
+
+    # Only the ETag identifies the viewer, so If-Modified-Since alone is not
+    # enough to answer 304; Last-Modified is sent for information only
+    if request.if_none_match and request.if_none_match.contains_weak(etag):
+        return with_validators(make_response('', 304))
+    return None
+
+def with_validators(rv):
+    """Attach the ETag and Last-Modified computed by check_not_modified"""
+    response = make_response(rv)
+    validators = getattr(g, 'validators', None)
+    if validators:
+        etag, last_modified = validators
+        # Weak, so the same tag stays valid for gzip and brotli encodings of the page
+        response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -4,6 +4,19 @@ import string
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# SMTP can take seconds; send in the background on a small bounded pool so
+# a request never waits on it and a mail outage can't pile up threads
+EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', 4))
+EMAIL_QUEUE_LIMIT = int(os.environ.get('EMAIL_QUEUE_LIMIT', 200))
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 15))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_queue_slots = threading.BoundedSemaphore(EMAIL_QUEUE_LIMIT)
 
 def generate_verification_code():
     """Generate a 6-digit verification code."""
@@ -13,6 +26,43 @@ def generate_reset_token():
     """Generate a secure reset token."""
     return ''.join(random.choices(string.ascii_letters + string.digits, k=32))
 
+def send_in_background(send, *args, on_failure=None, **kwargs):
+    """Queue send(*args, **kwargs) on the email pool; returns False if the queue is full.
+
+    True only means the message was queued. If sending later fails,
+    on_failure(error) is called from the pool thread so the failure can be
+    recorded where admins will see it.
+    """
+    global _executor, _executor_pid
+    if not _queue_slots.acquire(blocking=False):
+        print("Email queue is full; dropping message")
+        return False
+    with _executor_lock:
+        # Pools don't survive fork(), so each worker process starts its own
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=EMAIL_WORKERS, thread_name_prefix='email')
+            _executor_pid = os.getpid()
+
+    def run():
+        error = None
+        try:
+            if not send(*args, **kwargs):
+                error = f"{send.__name__} could not send the message"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            _queue_slots.release()
+        if error:
+            print(f"Error sending email in background: {error}")
+            if on_failure:
+                try:
+                    on_failure(error)
+                except Exception as e:
+                    print(f"Error recording email failure: {e}")
+
+    _executor.submit(run)
+    return True
+
 def send_verification_email(to_email, verification_code, full_name):
     """Send verification email to user using GMass SMTP."""
     return send_email(
@@ -47,7 +97,7 @@ def send_email(to_email, subject, body, is_html=False):
             msg.attach(MIMEText(body, 'plain'))
         
         # Create SMTP session
-        server = smtplib.SMTP(smtp_server, smtp_port)
+        server = smtplib.SMTP(smtp_server, smtp_port, timeout=SMTP_TIMEOUT)
         server.starttls()  # Enable TLS encryption
         server.login(smtp_username, smtp_password)
         
@@ -0,0 +1,317 @@
+"""Live issue events for the admin dashboards, sent as server-sent events.
+
+Each worker keeps one upstream feed and fans it out to every browser
+connected to /admin/events:
+
+- Firebase: issue writes add an entry under issue_events in the same
+  multi-path update, and one RTDB listener per worker receives them.
+- SQLite: triggers on the issues table record events in issue_events,
+  whichever app makes the write, and one thread per worker polls it.
+
+Every browser gets a bounded queue. A browser that falls too far behind
+gets a single "resync" event instead of the backlog, and reloads.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from flask import Response, request
+
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', 200))
+# Each stream holds a gthread worker's pool thread for its whole life; this
+# many threads per worker stay free for ordinary requests
+SSE_RESERVED_THREADS = int(os.environ.get('SSE_RESERVED_THREADS', 8))
+# Comment lines sent on idle streams so proxies keep them open and dead
+# connections are noticed
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+# Streams end after this long; browsers reconnect and resume from the last event id
+SSE_MAX_STREAM_SECONDS = float(os.environ.get('SSE_MAX_STREAM_SECONDS', 300))
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 5000))
+ISSUE_EVENTS_TTL_HOURS = float(os.environ.get('ISSUE_EVENTS_TTL_HOURS', 1))
+SQLITE_EVENT_POLL_SECONDS = float(os.environ.get('SQLITE_EVENT_POLL_SECONDS', 1))
+
+# The fields the dashboard tables show, as returned by /api/issues
+ISSUE_EVENT_FIELDS = ('id', 'title', 'category', 'status', 'created_at', 'full_name', 'index_number')
+
+ISSUE_EVENT_TYPES = ('issue-created', 'issue-status', 'issue-deleted')
+
+def format_sse(event, data, event_id=None):
+    """Encode one server-sent event; data is sent as JSON"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+RESYNC = format_sse('resync', {})
+
+class EventBroker:
+    """Fans events from one upstream feed out to bounded per-client queues"""
+
+    def __init__(self, queue_size=SSE_QUEUE_SIZE, max_clients=SSE_MAX_CLIENTS):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self.clients = set()
+        # Recent events, so a reconnecting browser can resume from Last-Event-ID
+        self.recent = deque(maxlen=queue_size)
+        self.lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.upstream = None
+        self.upstream_pid = None
+
+    def start(self, upstream):
+        """Start upstream(broker) once in this process; returns False if it failed.
+
+        Checked against the pid because a preloaded master's feed does not
+        survive fork(); every worker starts its own on first use.
+        """
+        with self.start_lock:
+            if self.upstream_pid == os.getpid():
+                return True
+            try:
+                self.upstream = upstream(self)
+            except Exception as e:
+                print(f"Error starting issue event feed: {e}")
+                return False
+            self.upstream_pid = os.getpid()
+            return True
+
+    def subscribe(self, last_event_id=None):
+        """Register a client; returns its queue, or None when the broker is full"""
+        # One extra slot for the stream preamble
+        client = queue.Queue(maxsize=self.queue_size + 1)
+        with self.lock:
+            if len(self.clients) >= self.max_clients:
+                return None
+            preamble = f'retry: {SSE_RETRY_MS}\n'
+            if self.recent:
+                # Lets a browser that sees no events before reconnecting resume from here
+                preamble += f'id: {self.recent[-1][0]}\n'
+            client.put_nowait(preamble + '\n')
+            if last_event_id:
+                ids = [event_id for event_id, _ in self.recent]
+                if last_event_id in ids:
+                    for _, message in list(self.recent)[ids.index(last_event_id) + 1:]:
+                        client.put_nowait(message)
+                else:
+                    client.put_nowait(RESYNC)
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def remember(self, event_id, event, data):
+        """Keep an event for resuming clients without sending it"""
+        with self.lock:
+            self.recent.append((event_id, format_sse(event, data, event_id)))
+
+    def publish(self, event, data, event_id=None):
+        """Queue an event for every client"""
+        message = format_sse(event, data, event_id)
+        with self.lock:
+            if event_id is not None:
+                self.recent.append((event_id, message))
+            for client in self.clients:
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    # Too far behind to patch the page event by event
+                    while True:
+                        try:
+                            client.get_nowait()
+                        except queue.Empty:
+                            break
+                    client.put_nowait(RESYNC)
+
+    def stream(self, client, heartbeat=SSE_HEARTBEAT_SECONDS, max_seconds=SSE_MAX_STREAM_SECONDS):
+        """Yield client's events until max_seconds pass or the connection drops"""
+        deadline = time.monotonic() + max_seconds
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    yield client.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+        finally:
+            self.unsubscribe(client)
+
+    def stats(self):
+        with self.lock:
+            return {'clients': len(self.clients), 'recent': len(self.recent),
+                    'backlog': sum(client.qsize() for client in self.clients)}
+
+_broker = None
+
+def get_event_broker():
+    """Get the process-wide issue event broker"""
+    global _broker
+    if _broker is None:
+        _broker = EventBroker()
+    return _broker
+
+def cap_clients_for_threads(threads, reserved=SSE_RESERVED_THREADS):
+    """Limit this worker's streams to its thread pool minus reserved; returns the new limit"""
+    broker = get_event_broker()
+    broker.max_clients = max(0, min(broker.max_clients, threads - reserved))
+    return broker.max_clients
+
+def serves_one_request_at_a_time():
+    """True under a gunicorn sync worker, which a long-lived response ties up entirely"""
+    return 'gunicorn.socket' in request.environ and not request.environ.get('wsgi.multithread')
+
+def event_stream_response(upstream):
+    """Stream issue events to the current request, starting upstream if needed"""
+    if serves_one_request_at_a_time():
+        # The arbiter would kill the worker at its timeout, and the browser reconnect
+        return {'error': 'Live updates need gthread or gevent workers'}, 503
+    broker = get_event_broker()
+    if not broker.start(upstream):
+        return {'error': 'Live updates are unavailable'}, 503
+    client = broker.subscribe(request.headers.get('Last-Event-ID'))
+    if client is None:
+        return {'error': 'Too many live update connections'}, 503, {'Retry-After': '30'}
+    return Response(broker.stream(client), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def listen_query(query, callback):
+    """Reference.listen() for a Query, which firebase_admin doesn't offer.
+
+    The RTDB REST stream honours orderBy/startAt, so the initial snapshot
+    and every resend after a reconnect hold only the matching children.
+    """
+    from firebase_admin import db, _sseclient
+
+    client = query._client
+    params = {**(client.params or {}), **query._params}
+    sse = _sseclient.SSEClient(client.base_url + query._pathurl, client.create_listener_session(), params=params)
+    return db.ListenerRegistration(callback, sse)
+
+def firebase_issue_listener(broker, path='issue_events'):
+    """Feed broker from one RTDB listener on recent issue_events; returns the listener registration"""
+    from firebase_admin import db
+
+    state = {'connected': False, 'last_id': ''}
+
+    def deliver(event_id, entry, publish):
+        if not isinstance(entry, dict) or entry.get('type') not in ISSUE_EVENT_TYPES:
+            return
+        data = {'issue': entry.get('issue') or {}, 'previous_status': entry.get('previous_status')}
+        if publish:
+            broker.publish(entry['type'], data, event_id)
+        else:
+            broker.remember(event_id, entry['type'], data)
+        state['last_id'] = max(state['last_id'], event_id)
+
+    def on_event(event):
+        try:
+            if event.path == '/':
+                entries = event.data or {}
+                if event.event_type == 'put':
+                    # The whole list: the initial snapshot, or again after the
+                    # listener reconnects; only entries newer than the last one seen are new
+                    ids = sorted(entries)
+                    if not state['connected']:
+                        ids = ids[-broker.queue_size:]
+                    for event_id in ids:
+                        if event_id > state['last_id']:
+                            deliver(event_id, entries[event_id], state['connected'])
+                    state['connected'] = True
+                else:
+                    for event_id in sorted(entries):
+                        deliver(event_id, entries[event_id], True)
+            elif event.path.count('/') == 1 and event.data is not None:
+                # A single new entry; deletions by the sweeper arrive as None
+                deliver(event.path[1:], event.data, True)
+        except Exception as e:
+            print(f"Error handling issue event: {e}")
+
+    # Only events young enough to be replayed; older ones await the pruner
+    since = int((time.time() - ISSUE_EVENTS_TTL_HOURS * 3600) * 1000)
+    return listen_query(db.reference(path).order_by_child('at').start_at(since), on_event)
+
+def ensure_sqlite_issue_events(conn):
+    """Create the issue_events table and the triggers that fill it"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS issue_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            issue_id INTEGER NOT NULL,
+            status TEXT,
+            previous_status TEXT,
+            created_at INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_issue_events_created_at ON issue_events(created_at)')
+    triggers = {
+        'issue_created': ('AFTER INSERT ON issues',
+                          "'issue-created', NEW.id, NEW.status, NULL"),
+        'issue_status': ('AFTER UPDATE OF status ON issues WHEN OLD.status IS NOT NEW.status',
+                         "'issue-status', NEW.id, NEW.status, OLD.status"),
+        'issue_deleted': ('AFTER DELETE ON issues',
+                          "'issue-deleted', OLD.id, OLD.status, NULL"),
+    }
+    for name, (when, values) in triggers.items():
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS record_{name}_event {when}
+            BEGIN
+                INSERT INTO issue_events (type, issue_id, status, previous_status, created_at)
+                VALUES ({values}, CAST(strftime('%s', 'now') AS INTEGER));
+            END
+        ''')
+    conn.commit()
+
+SQLITE_EVENT_QUERY = '''
+    SELECT e.id AS event_id, e.type, e.issue_id AS id, e.status, e.previous_status,
+           i.subject AS title, i.category, i.created_at, u.full_name, u.index_number
+    FROM issue_events e
+    LEFT JOIN issues i ON i.id = e.issue_id
+    LEFT JOIN users u ON u.id = i.student_id
+'''
+
+def sqlite_event_data(row):
+    """Return (event type, data) for an issue_events row from SQLITE_EVENT_QUERY"""
+    issue = {field: row[field] for field in ISSUE_EVENT_FIELDS}
+    return row['type'], {'issue': issue, 'previous_status': row['previous_status']}
+
+def sqlite_issue_poller(broker, connect, interval=SQLITE_EVENT_POLL_SECONDS):
+    """Feed broker by polling issue_events in a daemon thread; returns an Event that stops it"""
+    stop_event = threading.Event()
+    conn = connect()
+    ensure_sqlite_issue_events(conn)
+    recent = conn.execute(SQLITE_EVENT_QUERY + ' ORDER BY e.id DESC LIMIT ?', (broker.queue_size,)).fetchall()
+    for row in reversed(recent):
+        broker.remember(str(row['event_id']), *sqlite_event_data(row))
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM issue_events').fetchone()[0]
+    conn.close()
+
+    def run():
+        nonlocal last_id
+        conn = connect()
+        next_prune = 0
+        while not stop_event.wait(interval):
+            try:
+                rows = conn.execute(SQLITE_EVENT_QUERY + ' WHERE e.id > ? ORDER BY e.id LIMIT 500',
+                                    (last_id,)).fetchall()
+                for row in rows:
+                    broker.publish(*sqlite_event_data(row), str(row['event_id']))
+                    last_id = row['event_id']
+                if time.monotonic() >= next_prune:
+                    conn.execute('DELETE FROM issue_events WHERE created_at < ?',
+                                 (int(time.time() - ISSUE_EVENTS_TTL_HOURS * 3600),))
+                    conn.commit()
+                    next_prune = time.monotonic() + 300
+            except Exception as e:
+                print(f"Error polling issue events: {e}")
+
+    thread = threading.Thread(target=run, name='issue-events', daemon=True)
+    thread.start()
+    return stop_event
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import timezone
+
+import firebase_admin
+import httpx
+
+from data_versions import firebase_version_bump
+from firebase_config import (FIREBASE_HTTP_POOL_SIZE, FIREBASE_HTTP_TIMEOUT, email_key,
+                             user_issue_index_changes)
+
+class AsyncRealtimeDB:
+    """Async access to the Realtime Database through its REST API.
+
+    One pooled httpx.AsyncClient runs on a background event loop owned by
+    this process. Flask runs each async view in its own short-lived loop, so
+    the views await the shared client through run_coroutine_threadsafe;
+    connections are kept alive across requests and independent reads can be
+    awaited together with asyncio.gather.
+    """
+
+    def __init__(self, database_url=None, credential=None, transport=None,
+                 max_connections=FIREBASE_HTTP_POOL_SIZE, timeout=FIREBASE_HTTP_TIMEOUT):
+        self.database_url = database_url
+        self.credential = credential
+        self.transport = transport
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.loop = None
+        self.client = None
+        self.pid = None
+        self.start_lock = threading.Lock()
+        self.token = None
+        self.token_expiry = 0
+        self.token_lock = None
+
+    def _ensure_loop(self):
+        """Start the background loop and client; threads don't survive fork(), so once per process"""
+        if self.loop is not None and self.pid == os.getpid():
+            return
+        with self.start_lock:
+            if self.loop is not None and self.pid == os.getpid():
+                return
+            if self.database_url is None:
+                app = firebase_admin.get_app()
+                self.database_url = app.options.get('databaseURL')
+                self.credential = self.credential or app.credential
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='rtdb-async', daemon=True).start()
+            self.client = httpx.AsyncClient(
+                base_url=self.database_url.rstrip('/'),
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                transport=self.transport)
+            self.token = None
+            self.token_lock = None
+            self.loop = loop
+            self.pid = os.getpid()
+
+    def _run(self, coro):
+        """Run coro on the background loop and return an awaitable for the caller's loop"""
+        self._ensure_loop()
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    async def _access_token(self):
+        if self.credential is None:
+            return None
+        if self.token_lock is None:
+            self.token_lock = asyncio.Lock()
+        async with self.token_lock:
+            if self.token is None or time.time() > self.token_expiry - 60:
+                # The google-auth refresh is blocking; keep it off the loop
+                info = await asyncio.get_running_loop().run_in_executor(None, self.credential.get_access_token)
+                self.token = info.access_token
+                expiry = getattr(info, 'expiry', None)
+                if expiry is not None and expiry.tzinfo is None:
+                    # google-auth reports a naive datetime in UTC, not local time
+                    expiry = expiry.replace(tzinfo=timezone.utc)
+                self.token_expiry = expiry.timestamp() if expiry else time.time() + 3000
+        return self.token
+
+    async def _request(self, method, path, params=None, body=None):
+        headers = {}
+        token = await self._access_token()
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        response = await self.client.request(method, f"/{path.strip('/')}.json", params=params,
+                                             headers=headers, json=body)
+        response.raise_for_status()
+        return response.json()
+
+    async def get(self, path, order_by=None, equal_to=None, limit_to_last=None, shallow=False):
+        """Read a path, optionally as an indexed query like Reference.order_by_child"""
+        params = {}
+        if order_by:
+            params['orderBy'] = json.dumps(order_by)
+        if equal_to is not None:
+            params['equalTo'] = json.dumps(equal_to)
+        if limit_to_last:
+            params['limitToLast'] = str(limit_to_last)
+        if shallow:
+            params['shallow'] = 'true'
+        return await self._run(self._request('GET', path, params=params))
+
+    async def update(self, updates):
+        """Apply a multi-path update at the root, like Reference.update"""
+        return await self._run(self._request('PATCH', '', body=updates))
+
+    async def set(self, path, value):
+        return await self._run(self._request('PUT', path, body=value))
+
+    async def get_data_versions(self, *collections):
+        """Get {collection: {'version', 'updated_at'}} with one small read"""
+        try:
+            versions = await self.get('data_versions') or {}
+        except Exception as e:
+            print(f"Error getting data versions from Firebase: {e}")
+            versions = {}
+        return {name: versions.get(name) or {'version': 0, 'updated_at': 0} for name in collections}
+
+    async def get_user(self, user_id):
+        """Get user from Firebase Realtime Database"""
+        try:
+            user_data = await self.get(f'users/{user_id}')
+            return {'id': user_id, **user_data} if user_data else None
+        except Exception as e:
+            print(f"Error getting user from Firebase: {e}")
+            return None
+
+    async def get_users(self):
+        """Get {user_id: user} for every user"""
+        try:
+            return await self.get('users') or {}
+        except Exception as e:
+            print(f"Error getting all users from Firebase: {e}")
+            return {}
+
+    async def get_users_by_role(self, *roles):
+        """Get [user] with any of roles, one indexed query per role run together"""
+        try:
+            results = await asyncio.gather(*(self.get('users', order_by='role', equal_to=role) for role in roles))
+            return [{'id': user_id, **user} for users in results for user_id, user in (users or {}).items()]
+        except Exception as e:
+            print(f"Error getting users by role from Firebase: {e}")
+            return []
+
+    async def get_issues(self):
+        """Get all issues, newest first"""
+        try:
+            issues_data = await self.get('issues') or {}
+            issues = [{'id': issue_id, **issue} for issue_id, issue in issues_data.items()]
+            issues.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            return issues
+        except Exception as e:
+            print(f"Error getting issues from Firebase: {e}")
+            return []
+
+    async def get_issue_counts(self):
+        """Get (status_counts, category_counts, categories), the counters kept by every issue write"""
+        try:
+            status_counts, category_counts, categories = await asyncio.gather(
+                self.get('status_counts'), self.get('category_counts'), self.get('issue_categories'))
+            return status_counts or {}, category_counts or {}, categories or {}
+        except Exception as e:
+            print(f"Error getting issue counts from Firebase: {e}")
+            return {}, {}, {}
+
+    async def get_issue(self, issue_id):
+        """Get a single issue by ID"""
+        try:
+            issue_data = await self.get(f'issues/{issue_id}')
+            return {'id': issue_id, **issue_data} if issue_data else None
+        except Exception as e:
+            print(f"Error getting issue from Firebase: {e}")
+            return None
+
+    async def get_user_issue_index(self, user_id):
+        """Get a user's issue summaries from user_issues/<uid>, newest first"""
+        try:
+            built, index_data = await asyncio.gather(
+                self.get(f'user_issues_built/{user_id}'), self.get(f'user_issues/{user_id}'))
+            if not built:
+                # No index yet (issues created before it existed); build it once
+                issues_data = await self.get('issues', order_by='user_id', equal_to=user_id) or {}
+                changes = user_issue_index_changes(user_id, issues_data)
+                await self.update(changes)
+                index_data = changes[f'user_issues/{user_id}']
+            index_data = index_data or {}
+
+            issues = [{'id': issue_id, **entry} for issue_id, entry in index_data.items()]
+            issues.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            return issues
+        except Exception as e:
+            print(f"Error getting user issue index from Firebase: {e}")
+            return []
+
+    async def get_email_verification(self, email):
+        """Get the pending verification for an email with a single-path read"""
+        try:
+            key = email_key(email)
+            verification = await self.get(f'email_verifications/{key}')
+            if verification:
+                return {'id': key, **verification}
+
+            # Records written before verifications were keyed by email hash
+            legacy_data = await self.get('email_verifications', order_by='email', equal_to=email) or {}
+            legacy = [{'id': k, **v} for k, v in legacy_data.items()]
+            if legacy:
+                legacy.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+                return legacy[0]
+            return None
+        except Exception as e:
+            print(f"Error getting email verification from Firebase: {e}")
+            return None
+
+    async def mark_email_verified(self, user_id, verification_id, verified_at):
+        """Verify the user and consume the verification in one atomic write"""
+        try:
+            await self.update({
+                f'users/{user_id}/is_verified': True,
+                f'users/{user_id}/verified_at': verified_at,
+                f'email_verifications/{verification_id}': None,
+                **firebase_version_bump('users')
+            })
+            return True
+        except Exception as e:
+            print(f"Error marking email verified in Firebase: {e}")
+            return False
@@ -1,9 +1,37 @@
 import firebase_admin
 from firebase_admin import credentials, db
+from data_versions import firebase_version_bump
+from event_stream import ISSUE_EVENT_FIELDS
+from issue_search import get_search_index
 import json
 import os
 from datetime import datetime
+import hashlib
+import random
+import threading
+import time
 import uuid
+from urllib.parse import quote
+
+# User fields copied onto each issue so list views need no user reads
+ISSUE_USER_SNAPSHOT_FIELDS = ('full_name', 'email', 'index_number')
+
+# Issue fields mirrored into user_issues/<uid>/<issue_id> for student pages
+USER_ISSUE_INDEX_FIELDS = ('title', 'category', 'status', 'created_at', 'updated_at')
+
+# Threaded and gevent workers run many RTDB calls at once; requests keeps only
+# 10 pooled connections per host by default and discards the rest after use
+FIREBASE_HTTP_POOL_SIZE = int(os.environ.get('FIREBASE_HTTP_POOL_SIZE', 50))
+# Seconds before a stalled RTDB call fails instead of holding a worker slot
+FIREBASE_HTTP_TIMEOUT = float(os.environ.get('FIREBASE_HTTP_TIMEOUT', 30))
+# A status or category filter matching at most this many issues reads them
+# all through its index; commoner values are found faster paging by date
+ISSUE_FILTER_INDEX_MAX = int(os.environ.get('ISSUE_FILTER_INDEX_MAX', 1000))
+
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+_push_lock = threading.Lock()
+_last_push_time = 0
+_last_random_chars = []
 
 def initialize_firebase():
     """Initialize Firebase with credentials and database URL"""
@@ -29,7 +57,8 @@ def initialize_firebase():
 
         # Initialize Firebase with your Realtime Database URL
         firebase_admin.initialize_app(cred, {
-            'databaseURL': 'https://scp-2-c5c6d-default-rtdb.firebaseio.com/'
+            'databaseURL': 'https://scp-2-c5c6d-default-rtdb.firebaseio.com/',
+            'httpTimeout': FIREBASE_HTTP_TIMEOUT
         })
 
         print("Firebase initialized successfully with Realtime Database")
@@ -39,22 +68,207 @@ def initialize_firebase():
         print(f"Error initializing Firebase: {e}")
         return False
 
+def configure_http_pool(ref, pool_size=FIREBASE_HTTP_POOL_SIZE):
+    """Size the connection pool of the session behind a database reference"""
+    try:
+        from requests.adapters import HTTPAdapter
+        session = ref._client.session
+        for prefix in ('https://', 'http://'):
+            retries = session.get_adapter(prefix).max_retries
+            session.mount(prefix, HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retries))
+    except Exception as e:
+        print(f"Could not resize Firebase connection pool: {e}")
+
+def generate_push_id():
+    """Generate a chronologically ordered key in the same format as push()
+
+    Lets a new child be written together with its index entries in one
+    multi-path update instead of a push() followed by separate writes.
+    """
+    global _last_push_time, _last_random_chars
+    with _push_lock:
+        now = int(time.time() * 1000)
+        if now == _last_push_time:
+            # Same millisecond: increment the random part to keep ordering
+            i = 11
+            while i >= 0 and _last_random_chars[i] == 63:
+                _last_random_chars[i] = 0
+                i -= 1
+            _last_random_chars[i] += 1
+        else:
+            _last_push_time = now
+            _last_random_chars = [random.randrange(64) for _ in range(12)]
+
+        time_chars = []
+        for _ in range(8):
+            time_chars.append(PUSH_CHARS[now % 64])
+            now //= 64
+        return ''.join(reversed(time_chars)) + ''.join(PUSH_CHARS[c] for c in _last_random_chars)
+
+def user_issue_entry(issue_data):
+    """Return the user_issues index entry for an issue"""
+    return {k: issue_data[k] for k in USER_ISSUE_INDEX_FIELDS if k in issue_data}
+
+def user_issue_index_changes(user_id, issues_data):
+    """Return the multi-path update that writes a user's whole user_issues index.
+
+    user_issues_built/<uid> records that the index was built, so users
+    with no issues are not rebuilt (an empty index reads back as null).
+    """
+    index_data = {issue_id: user_issue_entry(issue) for issue_id, issue in issues_data.items()}
+    return {f'user_issues/{user_id}': index_data or None, f'user_issues_built/{user_id}': True}
+
+def attach_user_info(issues, users):
+    """Fill student fields on issues that predate the snapshot from a {user_id: user} map"""
+    for issue in issues:
+        if 'full_name' in issue and 'email' in issue:
+            # Snapshot written by submit_issue
+            continue
+        user = users.get(issue.get('user_id')) if issue.get('user_id') else None
+        if user:
+            issue['full_name'] = user.get('full_name', 'Unknown')
+            issue['email'] = user.get('email', 'Unknown')
+            issue.setdefault('index_number', user.get('index_number', 'N/A'))
+        else:
+            issue['full_name'] = 'Unknown User'
+            issue['email'] = 'Unknown'
+    return issues
+
+def category_key(name):
+    """Return the RTDB-safe key for a category name, ignoring case and spacing"""
+    normalized = ' '.join((name or '').split()).casefold()
+    return quote(normalized, safe='').replace('.', '%2E') or '_'
+
+def category_count_change(name, delta):
+    """Return the multi-path update entry that moves a category's issue count"""
+    return {f'category_counts/{category_key(name)}': {'.sv': {'increment': delta}}}
+
+def status_count_change(status, delta):
+    """Return the multi-path update entry that moves a status's issue count"""
+    return {f'status_counts/{category_key(status)}': {'.sv': {'increment': delta}}}
+
+def issue_event_change(event_type, issue_id, issue, previous_status=None):
+    """Return the multi-path update entry that announces an issue change to live dashboards"""
+    snapshot = {k: issue[k] for k in ISSUE_EVENT_FIELDS if issue.get(k) is not None}
+    snapshot['id'] = issue_id
+    event = {'type': event_type, 'issue': snapshot, 'at': {'.sv': 'timestamp'}}
+    if previous_status:
+        event['previous_status'] = previous_status
+    return {f'issue_events/{generate_push_id()}': event}
+
+def issue_update_changes(issue_id, issue, data):
+    """Return the multi-path update that applies data to an issue and everything derived from it.
+
+    issue is the stored issue; it may be empty when data touches no indexed
+    field, status or category.
+    """
+    updates = {f'issues/{issue_id}/{k}': v for k, v in data.items()}
+    index_entry = user_issue_entry(data)
+    if index_entry and issue.get('user_id'):
+        for k, v in index_entry.items():
+            updates[f"user_issues/{issue['user_id']}/{issue_id}/{k}"] = v
+    if issue and 'status' in data and data['status'] != issue.get('status'):
+        updates.update(issue_event_change('issue-status', issue_id, {**issue, **data}, issue.get('status')))
+        if issue.get('status'):
+            updates.update(status_count_change(issue['status'], -1))
+        if data['status']:
+            updates.update(status_count_change(data['status'], 1))
+    if 'category' in data:
+        old_category = issue.get('category')
+        if category_key(old_category) != category_key(data['category']):
+            if old_category:
+                updates.update(category_count_change(old_category, -1))
+            if data['category']:
+                updates.update(category_count_change(data['category'], 1))
+    return updates
+
+def issue_delete_changes(issue_id, issue):
+    """Return the multi-path update that deletes an issue and everything derived from it"""
+    updates = {f'issues/{issue_id}': None}
+    if issue.get('user_id'):
+        updates[f"user_issues/{issue['user_id']}/{issue_id}"] = None
+    if issue.get('category'):
+        updates.update(category_count_change(issue['category'], -1))
+    if issue.get('status'):
+        updates.update(status_count_change(issue['status'], -1))
+    updates.update(issue_event_change('issue-deleted', issue_id, issue))
+    return updates
+
+def merge_changes(*changes):
+    """Combine multi-path updates, adding up server increments aimed at the same path"""
+    merged = {}
+    for change in changes:
+        for path, value in change.items():
+            previous = merged.get(path)
+            if increment_of(previous) is not None and increment_of(value) is not None:
+                value = {'.sv': {'increment': increment_of(previous) + increment_of(value)}}
+            merged[path] = value
+    return merged
+
+def increment_of(value):
+    """Return the amount of a {'.sv': {'increment': n}} server value, else None"""
+    if isinstance(value, dict) and isinstance(value.get('.sv'), dict):
+        return value['.sv'].get('increment')
+    return None
+
+def email_key(email):
+    """Return the RTDB-safe key used to index records by email address"""
+    normalized = (email or '').strip().lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
 class RealtimeDB:
     """Firebase Realtime Database integration"""
 
     def __init__(self):
         self.db_ref = db.reference()
+        configure_http_pool(self.db_ref)
+
+    def ensure_search_index(self):
+        """Build the local search index from every issue if nothing is indexed yet"""
+        index = get_search_index()
+        if index.is_empty():
+            count = index.rebuild(self.db_ref.child('issues').get() or {})
+            if count:
+                print(f"Built issue search index with {count} issues")
+        return index
+
+    def sync_search_index(self, method, *args):
+        """Mirror an issue write into the local search index without failing the write.
+
+        Updates to issues the index has never seen load the full issue and
+        index it, so partial writes never leave a half-empty row.
+        """
+        try:
+            index = self.ensure_search_index()
+            missing = getattr(index, method)(*args)
+            for issue_id in missing or []:
+                issue = self.db_ref.child('issues').child(issue_id).get()
+                if isinstance(issue, dict):
+                    index.upsert(issue_id, issue)
+        except Exception as e:
+            print(f"Error updating issue search index: {e}")
 
     def add_user(self, user_data):
         """Add user to Firebase Realtime Database"""
         try:
-            users_ref = self.db_ref.child('users')
-            new_user_ref = users_ref.push(user_data)
-            return new_user_ref.key
+            user_id = generate_push_id()
+            self.db_ref.update({f'users/{user_id}': user_data, **firebase_version_bump('users')})
+            return user_id
         except Exception as e:
             print(f"Error adding user to Firebase: {e}")
             return None
 
+    def add_users(self, users):
+        """Add many users with one multi-path update; returns their ids, or None if the write failed"""
+        try:
+            user_ids = [generate_push_id() for _ in users]
+            updates = {f'users/{user_id}': user_data for user_id, user_data in zip(user_ids, users)}
+            self.db_ref.update({**updates, **firebase_version_bump('users')})
+            return user_ids
+        except Exception as e:
+            print(f"Error adding users to Firebase: {e}")
+            return None
+
     def get_user(self, user_id):
         """Get user from Firebase Realtime Database"""
         try:
@@ -68,16 +282,13 @@ class RealtimeDB:
             return None
 
     def get_user_by_email(self, email):
-        """Get user by email"""
+        """Get user by email with an indexed query instead of a users download"""
         try:
-            users_ref = self.db_ref.child('users')
-            users_data = users_ref.get()
-
-            if users_data:
-                for user_id, user_data in users_data.items():
-                    if user_data.get('email') == email:
-                        user_data['id'] = user_id
-                        return user_data
+            users_data = (self.db_ref.child('users').order_by_child('email')
+                          .equal_to(email).limit_to_first(1).get())
+            for user_id, user_data in (users_data or {}).items():
+                user_data['id'] = user_id
+                return user_data
             return None
         except Exception as e:
             print(f"Error getting user by email: {e}")
@@ -100,13 +311,52 @@ class RealtimeDB:
     def update_user(self, user_id, data):
         """Update user in Firebase Realtime Database"""
         try:
-            user_ref = self.db_ref.child('users').child(user_id)
-            user_ref.update(data)
-            return True
+            updates = {f'users/{user_id}/{k}': v for k, v in data.items()}
+            self.db_ref.update({**updates, **firebase_version_bump('users')})
         except Exception as e:
             print(f"Error updating user in Firebase: {e}")
             return False
 
+        snapshot = {k: v for k, v in data.items() if k in ISSUE_USER_SNAPSHOT_FIELDS}
+        if snapshot:
+            # Fan the change out to the user's issues without delaying the caller
+            threading.Thread(target=self.propagate_user_snapshot, args=(user_id, snapshot), daemon=True).start()
+        return True
+
+    def propagate_user_snapshot(self, user_id, snapshot):
+        """Copy changed user display fields onto every issue the user submitted"""
+        try:
+            issues_ref = self.db_ref.child('issues')
+            issues_data = issues_ref.order_by_child('user_id').equal_to(user_id).get() or {}
+            updates = {}
+            for issue_id in issues_data:
+                for field, value in snapshot.items():
+                    updates[f'issues/{issue_id}/{field}'] = value
+            if updates:
+                self.db_ref.update({**updates, **firebase_version_bump('issues')})
+            return len(issues_data)
+        except Exception as e:
+            print(f"Error propagating user fields to issues in Firebase: {e}")
+            return 0
+
+    def delete_user(self, user_id):
+        """Delete user from Firebase Realtime Database"""
+        try:
+            self.db_ref.update({f'users/{user_id}': None, **firebase_version_bump('users')})
+            return True
+        except Exception as e:
+            print(f"Error deleting user from Firebase: {e}")
+            return False
+
+    def get_data_versions(self, *collections):
+        """Get {collection: {'version', 'updated_at'}} with one small read"""
+        try:
+            versions = self.db_ref.child('data_versions').get() or {}
+        except Exception as e:
+            print(f"Error getting data versions from Firebase: {e}")
+            versions = {}
+        return {name: versions.get(name) or {'version': 0, 'updated_at': 0} for name in collections}
+
     def get_all_users(self):
         """Get all users from Firebase Realtime Database"""
         try:
@@ -126,13 +376,138 @@ class RealtimeDB:
     def add_issue(self, issue_data):
         """Add issue to Firebase Realtime Database"""
         try:
-            issues_ref = self.db_ref.child('issues')
-            new_issue_ref = issues_ref.push(issue_data)
-            return new_issue_ref.key
+            issue_id = generate_push_id()
+            updates = {f'issues/{issue_id}': issue_data}
+            if issue_data.get('user_id'):
+                updates[f"user_issues/{issue_data['user_id']}/{issue_id}"] = user_issue_entry(issue_data)
+            if issue_data.get('category'):
+                updates.update(category_count_change(issue_data['category'], 1))
+            if issue_data.get('status'):
+                updates.update(status_count_change(issue_data['status'], 1))
+            updates.update(issue_event_change('issue-created', issue_id, issue_data))
+            # Issue, its index entry, its counts and its event are written atomically
+            self.db_ref.update({**updates, **firebase_version_bump('issues')})
+            self.sync_search_index('upsert', issue_id, issue_data)
+            return issue_id
         except Exception as e:
             print(f"Error adding issue to Firebase: {e}")
             return None
 
+    def query_issues(self, status=None, category=None, date_from=None, date_to=None,
+                     user_id=None, limit=25, cursor=None):
+        """Get one page of issues, newest first, filtered on the server side.
+
+        cursor is the (created_at, id) of the last issue of the previous page.
+        Returns (issues, next_cursor); next_cursor is None on the last page.
+        Issues are read in created_at order in bounded batches, so a page costs
+        a few small queries however many issues exist. A single status or
+        category filter that few issues match is answered from its index
+        instead, since paging by date would walk most of the tree to fill a page.
+        """
+        def matches(issue):
+            if status and issue.get('status') != status:
+                return False
+            if category and issue.get('category') != category:
+                return False
+            created_at = issue.get('created_at', '')
+            if date_from and created_at < date_from:
+                return False
+            if date_to and created_at >= date_to:
+                return False
+            if cursor and (created_at, issue['id']) >= tuple(cursor):
+                return False
+            return True
+
+        try:
+            issues_ref = self.db_ref.child('issues')
+            page = []
+
+            indexed = None
+            if user_id:
+                # A single student's issues are few; the user_id index finds them
+                indexed = ('user_id', user_id)
+            elif status and not category:
+                if self.get_status_count(status) <= ISSUE_FILTER_INDEX_MAX:
+                    indexed = ('status', status)
+            elif category and not status:
+                if self.get_category_count(category) <= ISSUE_FILTER_INDEX_MAX:
+                    indexed = ('category', category)
+
+            if indexed:
+                issues_data = issues_ref.order_by_child(indexed[0]).equal_to(indexed[1]).get() or {}
+                candidates = [{'id': k, **v} for k, v in issues_data.items()]
+                page = [issue for issue in candidates if matches(issue)]
+                page.sort(key=lambda x: (x.get('created_at', ''), x['id']), reverse=True)
+            else:
+                batch_size = min(max(limit * 2, 50), 500)
+                upper = cursor[0] if cursor else date_to
+                seen = set()
+                while len(page) <= limit:
+                    query = issues_ref.order_by_child('created_at')
+                    if date_from:
+                        query = query.start_at(date_from)
+                    if upper is not None:
+                        query = query.end_at(upper)
+                    batch = query.limit_to_last(batch_size).get() or {}
+                    batch_issues = sorted(({'id': k, **v} for k, v in batch.items()),
+                                          key=lambda x: (x.get('created_at', ''), x['id']), reverse=True)
+                    for issue in batch_issues:
+                        # end_at() is inclusive, so consecutive batches overlap
+                        if issue['id'] not in seen and matches(issue):
+                            page.append(issue)
+                        seen.add(issue['id'])
+                    if len(batch_issues) < batch_size:
+                        break
+                    oldest = batch_issues[-1].get('created_at', '')
+                    if oldest == upper:
+                        # A whole batch shares one timestamp; widen instead of looping
+                        batch_size *= 2
+                    upper = oldest
+
+            next_cursor = None
+            if len(page) > limit:
+                page = page[:limit]
+                next_cursor = (page[-1].get('created_at', ''), page[-1]['id'])
+            return page, next_cursor
+        except Exception as e:
+            print(f"Error querying issues from Firebase: {e}")
+            return [], None
+
+    def get_issue(self, issue_id):
+        """Get a single issue by ID"""
+        try:
+            issue_data = self.db_ref.child('issues').child(issue_id).get()
+            if issue_data:
+                return {'id': issue_id, **issue_data}
+            return None
+        except Exception as e:
+            print(f"Error getting issue from Firebase: {e}")
+            return None
+
+    def get_user_issue_index(self, user_id):
+        """Get a user's issue summaries from user_issues/<uid>, newest first"""
+        try:
+            if self.db_ref.child('user_issues_built').child(user_id).get():
+                index_data = self.db_ref.child('user_issues').child(user_id).get() or {}
+            else:
+                # No index yet (issues created before it existed); build it once
+                index_data = self.rebuild_user_issue_index(user_id)
+
+            issues = [{'id': issue_id, **entry} for issue_id, entry in index_data.items()]
+            issues.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            return issues
+        except Exception as e:
+            print(f"Error getting user issue index from Firebase: {e}")
+            return []
+
+    def rebuild_user_issue_index(self, user_id):
+        """Rebuild user_issues/<uid> from the issues tree"""
+        issues_ref = self.db_ref.child('issues')
+        issues_data = issues_ref.order_by_child('user_id').equal_to(user_id).get() or {}
+        changes = user_issue_index_changes(user_id, issues_data)
+        self.db_ref.update(changes)
+        return changes[f'user_issues/{user_id}'] or {}
+
     def get_issues(self, user_id=None, limit=None):
         """Get issues from Firebase Realtime Database"""
         try:
@@ -163,8 +538,12 @@ class RealtimeDB:
     def update_issue(self, issue_id, data):
         """Update issue in Firebase Realtime Database"""
         try:
-            issue_ref = self.db_ref.child('issues').child(issue_id)
-            issue_ref.update(data)
+            issue = {}
+            if user_issue_entry(data) or 'category' in data:
+                issue = self.db_ref.child('issues').child(issue_id).get() or {}
+            updates = issue_update_changes(issue_id, issue, data)
+            self.db_ref.update({**updates, **firebase_version_bump('issues')})
+            self.sync_search_index('update', issue_id, data)
             return True
         except Exception as e:
             print(f"Error updating issue in Firebase: {e}")
@@ -173,33 +552,293 @@ class RealtimeDB:
     def delete_issue(self, issue_id):
         """Delete issue from Firebase Realtime Database"""
         try:
-            issue_ref = self.db_ref.child('issues').child(issue_id)
-            issue_ref.delete()
+            issue = self.db_ref.child('issues').child(issue_id).get()
+            if not issue:
+                return True
+            self.db_ref.update({**issue_delete_changes(issue_id, issue), **firebase_version_bump('issues')})
+            self.sync_search_index('remove', issue_id)
             return True
         except Exception as e:
             print(f"Error deleting issue from Firebase: {e}")
             return False
 
+    def bulk_update_issues(self, issues, data):
+        """Apply data to every issue in {issue_id: issue} with one multi-path update"""
+        try:
+            changes = [issue_update_changes(issue_id, issue, data) for issue_id, issue in issues.items()]
+            self.db_ref.update(merge_changes(*changes, firebase_version_bump('issues')))
+            self.sync_search_index('update_many', list(issues), data)
+            return True
+        except Exception as e:
+            print(f"Error bulk updating issues in Firebase: {e}")
+            return False
+
+    def bulk_delete_issues(self, issues):
+        """Delete every issue in {issue_id: issue} with one multi-path update"""
+        try:
+            changes = [issue_delete_changes(issue_id, issue) for issue_id, issue in issues.items()]
+            self.db_ref.update(merge_changes(*changes, firebase_version_bump('issues')))
+            self.sync_search_index('remove', list(issues))
+            return True
+        except Exception as e:
+            print(f"Error bulk deleting issues in Firebase: {e}")
+            return False
+
+    def get_active_prefixes(self):
+        """Get the index number prefixes students may register with"""
+        try:
+            prefixes_data = self.db_ref.child('index_prefixes').get() or {}
+            return sorted(value.get('prefix', '') for value in prefixes_data.values()
+                          if value.get('is_active', True) and value.get('prefix'))
+        except Exception as e:
+            print(f"Error getting prefixes from Firebase: {e}")
+            return []
+
+    def ensure_category_index(self):
+        """Build category_counts and category_names once for data that predates them"""
+        if getattr(self, '_category_index_checked', False):
+            return
+        if not self.db_ref.child('meta').child('category_index').get():
+            self.rebuild_category_index()
+        self._category_index_checked = True
+
+    def rebuild_category_index(self):
+        """Recount issues per category and re-derive the normalized-name index.
+
+        Increments made while the recount runs can be lost, so run it when
+        issue traffic is quiet (it is only needed once, or after a restore).
+        """
+        try:
+            categories = self.db_ref.child('issue_categories').get() or {}
+            counts = {category_key(c.get('name')): 0 for c in categories.values() if c.get('name')}
+            names = {category_key(c.get('name')): category_id
+                     for category_id, c in categories.items() if c.get('name')}
+            for issue in (self.db_ref.child('issues').get() or {}).values():
+                if issue.get('category'):
+                    key = category_key(issue['category'])
+                    counts[key] = counts.get(key, 0) + 1
+            self.db_ref.update({'category_counts': counts, 'category_names': names, 'meta/category_index': 1})
+            return counts
+        except Exception as e:
+            print(f"Error rebuilding category index in Firebase: {e}")
+            return {}
+
+    def get_category_counts(self):
+        """Get {category_key: issue count} with one small read"""
+        try:
+            self.ensure_category_index()
+            return self.db_ref.child('category_counts').get() or {}
+        except Exception as e:
+            print(f"Error getting category counts from Firebase: {e}")
+            return {}
+
+    def ensure_status_counts(self):
+        """Build status_counts once for data that predates them"""
+        if getattr(self, '_status_counts_checked', False):
+            return
+        if not self.db_ref.child('meta').child('status_counts').get():
+            self.rebuild_status_counts()
+        self._status_counts_checked = True
+
+    def rebuild_status_counts(self):
+        """Recount issues per status; like rebuild_category_index, run it when traffic is quiet"""
+        try:
+            counts = {}
+            for issue in (self.db_ref.child('issues').get() or {}).values():
+                if issue.get('status'):
+                    key = category_key(issue['status'])
+                    counts[key] = counts.get(key, 0) + 1
+            self.db_ref.update({'status_counts': counts, 'meta/status_counts': 1})
+            return counts
+        except Exception as e:
+            print(f"Error rebuilding status counts in Firebase: {e}")
+            return {}
+
+    def get_status_count(self, status):
+        """Get the number of issues with a status"""
+        self.ensure_status_counts()
+        return self.db_ref.child('status_counts').child(category_key(status)).get() or 0
+
+    def get_category_count(self, name):
+        """Get the number of issues filed under a category name"""
+        self.ensure_category_index()
+        return self.db_ref.child('category_counts').child(category_key(name)).get() or 0
+
+    def find_category_by_name(self, name):
+        """Get the id of the category with this name, ignoring case and spacing"""
+        self.ensure_category_index()
+        return self.db_ref.child('category_names').child(category_key(name)).get()
+
+    def add_category(self, category_data):
+        """Add a category together with its name index entry"""
+        try:
+            category_id = generate_push_id()
+            self.db_ref.update({
+                f'issue_categories/{category_id}': category_data,
+                f"category_names/{category_key(category_data['name'])}": category_id,
+                **firebase_version_bump('categories')
+            })
+            return category_id
+        except Exception as e:
+            print(f"Error adding category to Firebase: {e}")
+            return None
+
+    def update_category(self, category_id, old_name, data):
+        """Update a category, moving its name index entry if the name changed"""
+        try:
+            updates = {f'issue_categories/{category_id}/{k}': v for k, v in data.items()}
+            if 'name' in data and category_key(data['name']) != category_key(old_name):
+                if self.find_category_by_name(old_name) == category_id:
+                    updates[f'category_names/{category_key(old_name)}'] = None
+                updates[f"category_names/{category_key(data['name'])}"] = category_id
+            self.db_ref.update({**updates, **firebase_version_bump('categories')})
+            return True
+        except Exception as e:
+            print(f"Error updating category in Firebase: {e}")
+            return False
+
+    def delete_category(self, category_id, name):
+        """Delete a category and its name index entry"""
+        try:
+            updates = {f'issue_categories/{category_id}': None}
+            # Legacy duplicates may share a name; only drop the entry if it is ours
+            if self.find_category_by_name(name) == category_id:
+                updates[f'category_names/{category_key(name)}'] = None
+            self.db_ref.update({**updates, **firebase_version_bump('categories')})
+            return True
+        except Exception as e:
+            print(f"Error deleting category from Firebase: {e}")
+            return False
+
+    def set_email_verification(self, email, verification_data):
+        """Store the pending verification for an email, replacing any older code"""
+        try:
+            verification_ref = self.db_ref.child('email_verifications').child(email_key(email))
+            verification_ref.set(verification_data)
+            return True
+        except Exception as e:
+            print(f"Error storing email verification in Firebase: {e}")
+            return False
+
+    def record_email_failure(self, email, kind, error):
+        """Keep the latest failed send per address under email_failures for admins"""
+        try:
+            self.db_ref.child('email_failures').child(email_key(email)).set({
+                'email': email,
+                'kind': kind,
+                'error': error,
+                'at': {'.sv': 'timestamp'}
+            })
+            return True
+        except Exception as e:
+            print(f"Error recording email failure in Firebase: {e}")
+            return False
+
+    def get_email_failures(self, limit=100):
+        """Get the most recent failed sends, newest first"""
+        try:
+            failures = self.db_ref.child('email_failures').order_by_child('at').limit_to_last(limit).get() or {}
+            return sorted(failures.values(), key=lambda failure: failure.get('at', 0), reverse=True)
+        except Exception as e:
+            print(f"Error getting email failures from Firebase: {e}")
+            return []
+
+    def get_email_verification(self, email):
+        """Get the pending verification for an email with a single-path read"""
+        try:
+            verifications_ref = self.db_ref.child('email_verifications')
+            key = email_key(email)
+            verification = verifications_ref.child(key).get()
+            if verification:
+                return {'id': key, **verification}
+
+            # Records written before verifications were keyed by email hash
+            # live under push keys; find them through the email index.
+            legacy_data = verifications_ref.order_by_child('email').equal_to(email).get() or {}
+            legacy = [{'id': k, **v} for k, v in legacy_data.items()]
+            if legacy:
+                legacy.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+                return legacy[0]
+            return None
+        except Exception as e:
+            print(f"Error getting email verification from Firebase: {e}")
+            return None
+
+    def delete_email_verification(self, verification_id):
+        """Delete a verification record by its key"""
+        try:
+            self.db_ref.child('email_verifications').child(verification_id).delete()
+            return True
+        except Exception as e:
+            print(f"Error deleting email verification from Firebase: {e}")
+            return False
+
+    def get_expired_verifications(self, cutoff):
+        """Get verification records that expired before cutoff via the expires_at index"""
+        try:
+            verifications_ref = self.db_ref.child('email_verifications')
+            verifications_data = verifications_ref.order_by_child('expires_at').end_at(cutoff.isoformat()).get() or {}
+            # Children without expires_at sort before every string; leave them alone
+            return [{'id': k, **v} for k, v in verifications_data.items() if v.get('expires_at')]
+        except Exception as e:
+            print(f"Error getting expired verifications from Firebase: {e}")
+            return []
+
+    def get_expired_issue_events(self, cutoff_ms):
+        """Get the ids of live-update events written before cutoff_ms via the at index"""
+        try:
+            events = self.db_ref.child('issue_events').order_by_child('at').end_at(cutoff_ms).get() or {}
+            return list(events)
+        except Exception as e:
+            print(f"Error getting expired issue events from Firebase: {e}")
+            return []
+
+    def get_unverified_users(self):
+        """Get users that never verified their email via the is_verified index"""
+        try:
+            users_ref = self.db_ref.child('users')
+            users_data = users_ref.order_by_child('is_verified').equal_to(False).get() or {}
+            return [{'id': k, **v} for k, v in users_data.items()]
+        except Exception as e:
+            print(f"Error getting unverified users from Firebase: {e}")
+            return []
+
+    def user_has_issues(self, user_id):
+        """Check whether a user has submitted at least one issue"""
+        try:
+            issues_ref = self.db_ref.child('issues')
+            issues_data = issues_ref.order_by_child('user_id').equal_to(user_id).limit_to_first(1).get()
+            return bool(issues_data)
+        except Exception as e:
+            print(f"Error checking issues for user in Firebase: {e}")
+            # Err on the side of keeping the account
+            return True
+
+    def delete_paths(self, paths, batch_size=500):
+        """Delete many paths with batched multi-path updates; returns the batch count"""
+        batches = 0
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            updates = {path: None for path in batch}
+            for collection in {path.split('/', 1)[0] for path in batch}:
+                if collection in ('issues', 'users'):
+                    updates.update(firebase_version_bump(collection))
+            self.db_ref.update(updates)
+            deleted_issues = [path.split('/')[1] for path in batch
+                              if path.startswith('issues/') and path.count('/') == 1]
+            if deleted_issues:
+                self.sync_search_index('remove', deleted_issues)
+            batches += 1
+        return batches
+
     def get_issues_with_user_info(self, limit=None):
         """Get issues with user information from Firebase Realtime Database"""
         try:
             issues = self.get_issues(limit=limit)
-
-            for issue in issues:
-                user_id = issue.get('user_id')
-                if user_id:
-                    user = self.get_user(user_id)
-                    if user:
-                        issue['full_name'] = user.get('full_name', 'Unknown')
-                        issue['email'] = user.get('email', 'Unknown')
-                    else:
-                        issue['full_name'] = 'Unknown User'
-                        issue['email'] = 'Unknown'
-                else:
-                    issue['full_name'] = 'Unknown User'
-                    issue['email'] = 'Unknown'
-
-            return issues
+            # Only issues created before snapshots existed need a user read
+            user_ids = {issue['user_id'] for issue in issues
+                        if not ('full_name' in issue and 'email' in issue) and issue.get('user_id')}
+            return attach_user_info(issues, {user_id: self.get_user(user_id) for user_id in user_ids})
         except Exception as e:
             print(f"Error getting issues with user info from Firebase: {e}")
             return []
@@ -2,7 +2,12 @@ import os
 import sqlite3
 from datetime import datetime
 from flask import Flask, render_template, request, redirect, url_for, session, flash, g
-from werkzeug.security import check_password_hash, generate_password_hash
+from password_policy import hash_password, verify_password
+from user_cache import UserProfileCache
+from compression import init_compression
+from static_assets import init_static_assets
+from template_cache import init_template_cache
+from fragment_cache import init_fragment_cache
 from email_utils import generate_verification_code, send_verification_email, validate_institutional_email, generate_reset_token, send_password_reset_email
 
 app = Flask(__name__)
@@ -11,6 +16,12 @@ app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-prod
 # Import and register blueprints
 from admin_routes import admin_bp
 app.register_blueprint(admin_bp)
+init_compression(app)
+init_static_assets(app)
+init_template_cache(app)
+init_fragment_cache(app)
+
+profile_cache = UserProfileCache()
 
 def parse_datetime(date_string):
     """Parse datetime string from database and return formatted string"""
@@ -141,7 +152,7 @@ def init_database():
     cursor.execute('INSERT INTO index_prefixes (prefix, description) VALUES (?, ?)', ('CS', 'Computer Science'))
     
     # Create admin user
-    admin_password = generate_password_hash('admin123')
+    admin_password = hash_password('admin123')
     cursor.execute('''
         INSERT INTO users (username, email, full_name, index_number, level, gender, password, role, is_verified, is_active)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -150,26 +161,19 @@ def init_database():
     conn.commit()
     conn.close()
 
+def fetch_user_by_username(username):
+    conn = get_db_connection()
+    user = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+    conn.close()
+    return user
+
 @app.before_request
 def load_logged_in_user():
     username = session.get('username')
-    if username is None:
+    if username is None or request.endpoint == 'static':
         g.user = None
     else:
-        conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
-        conn.close()
-        if user is None:
-            g.user = None
-        else:
-            g.user = {
-                "id": user["id"],
-                "username": user["username"],
-                "email": user["email"],
-                "full_name": user["full_name"],
-                "role": user["role"],
-                "is_verified": user["is_verified"]
-            }
+        g.user = profile_cache.load(username, lambda: fetch_user_by_username(username))
 
 @app.route('/')
 def index():
@@ -188,14 +192,22 @@ def login():
         conn.close()
         
         error = None
+        upgraded_hash = None
         if user is None:
             error = 'Incorrect email address.'
-        elif not check_password_hash(user['password'], password):
-            error = 'Incorrect password.'
-        elif not user['is_verified']:
-            error = 'Please verify your email before logging in.'
+        else:
+            valid, upgraded_hash = verify_password(user['password'], password)
+            if not valid:
+                error = 'Incorrect password.'
+            elif not user['is_verified']:
+                error = 'Please verify your email before logging in.'
         
         if error is None:
+            if upgraded_hash:
+                conn = get_db_connection()
+                conn.execute('UPDATE users SET password = ? WHERE id = ?', (upgraded_hash, user['id']))
+                conn.commit()
+                conn.close()
             session.clear()
             session['username'] = user['username']
             return redirect(url_for('dashboard'))
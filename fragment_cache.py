@@ -0,0 +1,145 @@
+import os
+import threading
+from collections import OrderedDict
+from flask import g, session
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.runtime import Undefined
+from markupsafe import Markup
+
+FRAGMENT_CACHE_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_ENTRIES', 512))
+FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+class FragmentCache:
+    """Per-worker LRU of rendered template fragments, bounded by entries and total size"""
+
+    def __init__(self, max_entries=FRAGMENT_CACHE_ENTRIES, max_bytes=FRAGMENT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            html = self.entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key, html):
+        if len(html) > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = html
+            self.size += len(html)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+class FragmentCacheExtension(Extension):
+    """{% cache 'name', versions.issues, viewer_role %}...{% endcache %}
+
+    Renders the body once per distinct key and reuses the HTML afterwards.
+    The key should hold everything the body depends on: the data version of
+    each collection it shows and the viewer's role. When a key part is
+    undefined (the view did not pass it) the body is rendered uncached.
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render_cached', [nodes.Const(parser.name), nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, template_name, parts, caller):
+        # auto_reload is on in debug, where templates change under a running app
+        if self.environment.auto_reload or any(isinstance(part, Undefined) for part in parts):
+            return caller()
+        key = (template_name,) + tuple(repr(part) for part in parts)
+        cache = self.environment.fragment_cache
+        html = cache.get(key)
+        if html is None:
+            html = caller()
+            cache.set(key, html)
+        return Markup(html)
+
+class LazyValue:
+    """Stand-in for a query result that runs the query on first use.
+
+    Pass one to a template for data only shown inside {% cache %} blocks:
+    when the fragment is cached the body never touches it, so the query is
+    skipped. Supports iteration, len(), truth tests, indexing and attribute
+    access, which covers result rows and lists of rows.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._loaded = False
+        self._value = None
+
+    def _get(self):
+        if not self._loaded:
+            self._value = self._loader()
+            self._loaded = True
+        return self._value
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __bool__(self):
+        return bool(self._get())
+
+    def __getitem__(self, key):
+        return self._get()[key]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._get(), name)
+
+def viewer_role():
+    """Role of the logged-in user in either app: g.user (SQLite) or the session (Firebase)"""
+    user = g.get('user')
+    if user:
+        return user['role']
+    return session.get('user_role')
+
+def init_fragment_cache(app):
+    """Enable the {% cache %} tag in app's templates and expose viewer_role for its keys.
+
+    versions defaults to empty, so views that pass no data versions render
+    their fragments uncached instead of failing on versions.issues.
+    """
+    if FragmentCacheExtension.identifier not in app.jinja_env.extensions:
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.context_processor(lambda: {'viewer_role': viewer_role(), 'versions': {}})
+    return app
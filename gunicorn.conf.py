@@ -0,0 +1,64 @@
+import os
+import sys
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+# Requests spend most of their time waiting on RTDB and SMTP, so a sync
+# worker serves one request at a time while idle. "gthread" runs `threads`
+# requests per worker; "gevent" runs up to `worker_connections` greenlets.
+# Compare them with `python bench_workers.py`. gthread is the default because
+# /admin/events holds a connection per open dashboard, which would tie up a
+# whole sync worker; the app refuses that stream under sync workers. Under
+# gthread each stream also holds a pool thread, so post_worker_init caps a
+# worker's streams at `threads - SSE_RESERVED_THREADS`; run gevent to serve
+# many dashboards.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# gunicorn silently turns "sync" into "gthread" when threads > 1
+threads = int(os.environ.get('GUNICORN_THREADS', 16)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+if worker_class == 'gevent':
+    # Patch before preload_app imports ssl, requests and smtplib in the master
+    from gevent import monkey
+    monkey.patch_all()
+
+# Import the app once in the master and fork workers from it (see wsgi.py)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+accesslog = '-'
+
+def memory_usage():
+    """Return this process's memory in kB from /proc/self/smaps_rollup (Linux only)"""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    usage[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        pass
+    return usage
+
+def post_worker_init(worker):
+    # One worker per host runs the TTL sweeper and prunes issue_events; see sweeper.start_sweeper_once
+    working_app = sys.modules.get('working_app')
+    if working_app is not None and working_app.firebase_db is not None:
+        from sweeper import start_sweeper_once
+        if start_sweeper_once(working_app.firebase_db):
+            worker.log.info('Worker %s runs the TTL sweeper and issue event pruner', worker.pid)
+
+    if worker.cfg.worker_class_str == 'gthread':
+        from event_stream import cap_clients_for_threads
+        streams = cap_clients_for_threads(worker.cfg.threads)
+        worker.log.info('Worker %s accepts %s live update stream(s) on %s threads',
+                        worker.pid, streams, worker.cfg.threads)
+
+    usage = memory_usage()
+    if usage:
+        private = usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0)
+        shared = usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0)
+        worker.log.info('Worker %s memory: rss=%s kB pss=%s kB private=%s kB shared=%s kB',
+                        worker.pid, usage.get('Rss', 0), usage.get('Pss', 0), private, shared)
@@ -0,0 +1,114 @@
+"""Build right-sized AVIF/WebP/PNG/JPEG variants of the images in static/.
+
+    python image_assets.py build
+
+Each image is resized to the widths in IMAGE_WIDTHS (never upscaled) and
+written through the static asset manifest as <name>-<width>w.<format>.
+Templates render them with picture(), which emits a <picture> with one
+srcset per format so browsers download the smallest file they can decode
+at the size the image is shown. Needs Pillow; AVIF needs a Pillow built
+with libavif (or pillow-avif-plugin).
+"""
+import io
+import os
+import posixpath
+
+from static_assets import STATIC_DIR, load_manifest, save_manifest, write_asset
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+# CSS widths the logo is shown at are 40 (header), 60 (mobile, welcome),
+# 86 (login card) and 100 (about); these cover each at 1x and 2x
+IMAGE_WIDTHS = {
+    'ktu-logo.png': (40, 64, 96, 128, 192),
+}
+# Unlisted images just get their formats converted at the original width
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+AVIF_QUALITY = int(os.environ.get('AVIF_QUALITY', 55))
+WEBP_QUALITY = int(os.environ.get('WEBP_QUALITY', 80))
+JPEG_QUALITY = int(os.environ.get('JPEG_QUALITY', 82))
+
+def encode(image, fmt):
+    """Encode image as fmt ('avif', 'webp', 'png' or 'jpeg'); returns bytes"""
+    output = io.BytesIO()
+    if fmt == 'avif':
+        image.save(output, 'AVIF', quality=AVIF_QUALITY, speed=4)
+    elif fmt == 'webp':
+        image.save(output, 'WEBP', quality=WEBP_QUALITY, method=6)
+    elif fmt == 'png':
+        image.save(output, 'PNG', optimize=True)
+    else:
+        image.convert('RGB').save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return output.getvalue()
+
+def image_formats(fallback):
+    """Formats to generate, most preferred first, ending with the fallback every browser reads"""
+    formats = []
+    if features.check('avif'):
+        formats.append('avif')
+    if features.check('webp'):
+        formats.append('webp')
+    return formats + [fallback]
+
+def build_variants(source, data, manifest):
+    """Write every width/format variant of one image; returns {format: total bytes}"""
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P', 'PA') else 'RGB')
+    root, ext = posixpath.splitext(source)
+    fallback = 'png' if ext.lower() == '.png' else 'jpeg'
+    widths = sorted({min(w, image.width) for w in IMAGE_WIDTHS.get(source, (image.width,))})
+
+    encoded = {}
+    for fmt in image_formats(fallback):
+        files = {}
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            files[width] = encode(resized, fmt)
+        encoded[fmt] = files
+
+    # A modern format is only worth a <source> if it beats the next one down
+    totals = {fmt: sum(len(b) for b in files.values()) for fmt, files in encoded.items()}
+    formats = list(encoded)
+    for fmt, next_fmt in zip(formats, formats[1:]):
+        if totals[fmt] >= totals[next_fmt]:
+            del encoded[fmt]
+
+    for fmt, files in encoded.items():
+        extension = 'jpg' if fmt == 'jpeg' else fmt
+        for width, payload in files.items():
+            write_asset(STATIC_DIR, f'{root}-{width}w.{extension}', payload, manifest)
+    return {fmt: totals[fmt] for fmt in encoded}
+
+def build_images():
+    """Build variants of every raster image in static/; returns {source: (original bytes, {format: bytes})}"""
+    if Image is None:
+        raise SystemExit('The image pipeline needs Pillow: pip install Pillow')
+    manifest = load_manifest()
+    report = {}
+    for name in sorted(os.listdir(STATIC_DIR)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            data = f.read()
+        report[name] = (len(data), build_variants(name, data, manifest))
+    save_manifest(manifest)
+    return report
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build responsive image variants for static/')
+    parser.add_argument('command', choices=['build'])
+    args = parser.parse_args()
+
+    for source, (original, totals) in build_images().items():
+        widths = IMAGE_WIDTHS.get(source)
+        print(f"{source}: {original / 1024:.1f} KB original, widths {', '.join(map(str, widths)) if widths else 'original'}")
+        for fmt, total in totals.items():
+            print(f"  {fmt:<5} {total / 1024:7.1f} KB for all widths")
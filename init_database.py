@@ -1,6 +1,8 @@
 import sqlite3
 import os
-from werkzeug.security import generate_password_hash
+from password_policy import hash_password
+from data_versions import ensure_sqlite_data_versions
+from issue_search import ensure_sqlite_issue_search
 
 def init_complete_database():
     """Initialize database with all required tables and data."""
@@ -155,13 +157,15 @@ def init_complete_database():
         cursor.execute('INSERT INTO system_settings (key, value, description, category) VALUES (?, ?, ?, ?)', (key, value, desc, cat))
     
     # Create admin user
-    admin_password = generate_password_hash('admin123')
+    admin_password = hash_password('admin123')
     cursor.execute('''
         INSERT INTO users (username, email, full_name, index_number, level, gender, password, role, is_verified, is_active)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ''', ('supa_admin', 'admin@ktu.edu.gh', 'System Administrator', 'ADM001', 'Staff', 'M', admin_password, 'supa_admin', True, True))
     
     conn.commit()
+    ensure_sqlite_data_versions(conn)
+    ensure_sqlite_issue_search(conn)
     conn.close()
     print("Database initialized successfully!")
 
@@ -0,0 +1,326 @@
+import html
+import os
+import re
+import sqlite3
+import threading
+
+# Local full-text index for the Firebase app. RTDB cannot search text, so
+# issue writes are mirrored into this file and queried with SQLite FTS5.
+# An empty index is built from Firebase on first use, and updates to issues it
+# has not seen load them in full. Run `python issue_search.py rebuild --firebase`
+# after restoring a backup or when several hosts write issues (each host only
+# sees its own writes).
+SEARCH_INDEX_PATH = os.environ.get('ISSUE_SEARCH_INDEX', 'issue_search.db')
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Text columns of the Firebase index, with their bm25 weights
+SEARCH_COLUMNS = (('title', 10.0), ('description', 3.0), ('admin_response', 1.0))
+
+# The same columns in the SQLite app's issues table
+SQLITE_SEARCH_COLUMNS = (('subject', 10.0), ('message', 3.0), ('response', 1.0))
+
+# Fields kept next to the text so results need no database round trip
+SEARCH_DOC_FIELDS = ('title', 'description', 'admin_response', 'category', 'status', 'created_at')
+
+# Control characters mark snippet matches; the snippet is HTML-escaped
+# before they are turned into <mark> tags
+_MATCH_START, _MATCH_END = '\x02', '\x03'
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query that matches every word.
+
+    Words are quoted so user input can never be parsed as FTS5 syntax; the
+    last word is matched as a prefix to support search-as-you-type.
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def snippet_html(snippet):
+    """Escape a snippet and wrap matched words in <mark>"""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+def create_fts_index(conn, fts_table, content_table, columns):
+    """Create an external-content FTS5 table kept in sync by triggers.
+
+    The text lives once, in content_table; FTS5 stores only the index.
+    Returns True if the index was created (and filled from existing rows).
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                          (fts_table,)).fetchone()
+    if exists:
+        return False
+
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+    conn.executescript(f'''
+        CREATE VIRTUAL TABLE {fts_table} USING fts5(
+            {names}, content='{content_table}', content_rowid='rowid', tokenize='porter unicode61'
+        );
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_after_insert AFTER INSERT ON {content_table} BEGIN
+            INSERT INTO {fts_table} (rowid, {names}) VALUES (new.rowid, {new_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_after_delete AFTER DELETE ON {content_table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {names}) VALUES ('delete', old.rowid, {old_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_after_update AFTER UPDATE OF {names} ON {content_table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {names}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO {fts_table} (rowid, {names}) VALUES (new.rowid, {new_values});
+        END;
+        INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild');
+    ''')
+    conn.commit()
+    return True
+
+def rebuild_fts_index(conn, fts_table):
+    """Re-read every row of the content table into the FTS index"""
+    conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+    conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('optimize')")
+    conn.commit()
+
+def _page_bounds(page, per_page):
+    page = max(1, int(page or 1))
+    per_page = max(1, min(int(per_page or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    return page, per_page
+
+def run_search(conn, fts_table, select, join, columns, query, page=1, per_page=DEFAULT_PAGE_SIZE,
+               where='', params=()):
+    """Run a ranked FTS query; returns {'results', 'total', 'page', 'per_page', 'has_more'}"""
+    page, per_page = _page_bounds(page, per_page)
+    match = build_match_query(query)
+    if match is None:
+        return {'results': [], 'total': 0, 'page': page, 'per_page': per_page, 'has_more': False}
+
+    weights = ', '.join(str(weight) for _, weight in columns)
+    condition = f'{fts_table} MATCH ? {where}'
+    total = conn.execute(f'SELECT COUNT(*) FROM {fts_table} {join} WHERE {condition}',
+                         (match, *params)).fetchone()[0]
+    rows = conn.execute(f'''
+        SELECT {select},
+               snippet({fts_table}, -1, '{_MATCH_START}', '{_MATCH_END}', '…', 16) AS snippet,
+               bm25({fts_table}, {weights}) AS rank
+        FROM {fts_table} {join}
+        WHERE {condition}
+        ORDER BY rank
+        LIMIT ? OFFSET ?
+    ''', (match, *params, per_page, (page - 1) * per_page)).fetchall()
+
+    results = []
+    for row in rows:
+        result = dict(row)
+        result['snippet'] = snippet_html(result['snippet'])
+        results.append(result)
+    return {
+        'results': results,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'has_more': page * per_page < total
+    }
+
+class IssueSearchIndex:
+    """FTS5 index of Firebase issues, stored in a local SQLite file"""
+
+    def __init__(self, path=SEARCH_INDEX_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.ready = False
+        self.lock = threading.Lock()
+
+    def connection(self):
+        """Return this thread's connection, creating the schema on first use"""
+        conn = getattr(self.local, 'conn', None)
+        # A connection opened before a preloading server forked must not be reused
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        if not self.ready:
+            with self.lock:
+                if not self.ready:
+                    conn.execute(f'''
+                        CREATE TABLE IF NOT EXISTS issue_docs (
+                            doc_id INTEGER PRIMARY KEY,
+                            issue_id TEXT UNIQUE NOT NULL,
+                            {', '.join(f'{field} TEXT' for field in SEARCH_DOC_FIELDS)}
+                        )
+                    ''')
+                    create_fts_index(conn, 'issue_search', 'issue_docs', [c for c, _ in SEARCH_COLUMNS])
+                    self.ready = True
+        return conn
+
+    @staticmethod
+    def _doc_values(data):
+        """Return (fields, values) of the indexed fields present in data"""
+        data = dict(data)
+        # Older issues store the title as "subject"
+        if 'title' not in data and 'subject' in data:
+            data['title'] = data['subject']
+        fields = [field for field in SEARCH_DOC_FIELDS if field in data]
+        return fields, [None if data[field] is None else str(data[field]) for field in fields]
+
+    def upsert(self, issue_id, data):
+        """Index an issue, or update the indexed fields present in data"""
+        fields, values = self._doc_values(data)
+        if not fields:
+            return
+        assignments = ', '.join(f'{field} = excluded.{field}' for field in fields)
+        conn = self.connection()
+        conn.execute(f'''
+            INSERT INTO issue_docs (issue_id, {', '.join(fields)}) VALUES (?, {', '.join('?' for _ in fields)})
+            ON CONFLICT (issue_id) DO UPDATE SET {assignments}
+        ''', [issue_id] + values)
+        conn.commit()
+
+    def update(self, issue_id, data):
+        """Apply a partial update to an indexed issue; returns [issue_id] if it is not indexed"""
+        return self.update_many([issue_id], data)
+
+    def update_many(self, issue_ids, data):
+        """Apply the same partial update to several issues in one transaction.
+
+        Returns the ids that have no row in the index (issues written before
+        the index existed, or by another host), so the caller can load and
+        upsert them in full.
+        """
+        fields = [field for field in SEARCH_DOC_FIELDS if field in data]
+        if not fields:
+            return []
+        values = [None if data[field] is None else str(data[field]) for field in fields]
+        statement = f"UPDATE issue_docs SET {', '.join(f'{field} = ?' for field in fields)} WHERE issue_id = ?"
+        conn = self.connection()
+        missing = [issue_id for issue_id in issue_ids
+                   if conn.execute(statement, values + [issue_id]).rowcount == 0]
+        conn.commit()
+        return missing
+
+    def is_empty(self):
+        """True if no issue has been indexed yet"""
+        return self.connection().execute('SELECT 1 FROM issue_docs LIMIT 1').fetchone() is None
+
+    def remove(self, issue_ids):
+        """Drop issues from the index"""
+        if isinstance(issue_ids, str):
+            issue_ids = [issue_ids]
+        conn = self.connection()
+        conn.executemany('DELETE FROM issue_docs WHERE issue_id = ?', [(issue_id,) for issue_id in issue_ids])
+        conn.commit()
+
+    def rebuild(self, issues):
+        """Replace the whole index with issues, a {issue_id: issue_data} mapping"""
+        rows = []
+        for issue_id, data in issues.items():
+            if isinstance(data, dict):
+                fields, values = self._doc_values(data)
+                rows.append([issue_id] + [values[fields.index(f)] if f in fields else None
+                                          for f in SEARCH_DOC_FIELDS])
+        conn = self.connection()
+        conn.execute('DELETE FROM issue_docs')
+        conn.executemany(f'''
+            INSERT INTO issue_docs (issue_id, {', '.join(SEARCH_DOC_FIELDS)})
+            VALUES (?, {', '.join('?' for _ in SEARCH_DOC_FIELDS)})
+        ''', rows)
+        conn.commit()
+        rebuild_fts_index(conn, 'issue_search')
+        return len(rows)
+
+    def search(self, query, page=1, per_page=DEFAULT_PAGE_SIZE, status=None, category=None):
+        """Ranked search over titles, descriptions and admin responses"""
+        where, params = '', []
+        if status:
+            where += ' AND d.status = ?'
+            params.append(status)
+        if category:
+            where += ' AND d.category = ?'
+            params.append(category)
+        return run_search(self.connection(), 'issue_search',
+                          'd.issue_id AS id, d.title, d.category, d.status, d.created_at',
+                          'JOIN issue_docs d ON d.doc_id = issue_search.rowid',
+                          SEARCH_COLUMNS, query, page, per_page, where, params)
+
+_search_index = None
+
+def get_search_index():
+    """Get the process-wide Firebase issue search index"""
+    global _search_index
+    if _search_index is None:
+        _search_index = IssueSearchIndex()
+    return _search_index
+
+def ensure_sqlite_issue_search(conn):
+    """Create the FTS index over the SQLite issues table, if missing.
+
+    Triggers keep it in sync with every insert, update and delete, whichever
+    app makes them. Older databases may lack the response column.
+    """
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(issues)')}
+    columns = [column for column, _ in SQLITE_SEARCH_COLUMNS if column in existing]
+    return create_fts_index(conn, 'issues_fts', 'issues', columns)
+
+def search_sqlite_issues(conn, query, page=1, per_page=DEFAULT_PAGE_SIZE, status=None, category=None):
+    """Ranked search over the SQLite issues table"""
+    columns = [(row[1], dict(SQLITE_SEARCH_COLUMNS)[row[1]])
+               for row in conn.execute('PRAGMA table_info(issues_fts)')]
+    where, params = '', []
+    if status:
+        where += ' AND i.status = ?'
+        params.append(status)
+    if category:
+        where += ' AND i.category = ?'
+        params.append(category)
+    return run_search(conn, 'issues_fts',
+                      'i.id, i.subject AS title, i.category, i.status, i.created_at',
+                      'JOIN issues i ON i.id = issues_fts.rowid',
+                      columns, query, page, per_page, where, params)
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Issue search index tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser('rebuild', help='rebuild the index from the database')
+    source = rebuild_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--firebase', action='store_true', help='rebuild the local index of Firebase issues')
+    source.add_argument('--sqlite', metavar='DB', help='rebuild the FTS index inside an SQLite database')
+    search_parser = subparsers.add_parser('search', help='run a search from the command line')
+    search_parser.add_argument('query')
+    search_parser.add_argument('--sqlite', metavar='DB', help='search an SQLite database instead of the Firebase index')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == 'rebuild' and args.sqlite:
+        conn = sqlite3.connect(args.sqlite)
+        if not ensure_sqlite_issue_search(conn):
+            rebuild_fts_index(conn, 'issues_fts')
+        count = conn.execute('SELECT COUNT(*) FROM issues').fetchone()[0]
+        conn.close()
+        print(f"Indexed {count} issues in {args.sqlite} ({time.perf_counter() - started:.2f}s)")
+    elif args.command == 'rebuild':
+        from firebase_config import initialize_firebase, get_realtime_db
+        if not initialize_firebase():
+            raise SystemExit('Could not connect to Firebase')
+        issues = get_realtime_db().db_ref.child('issues').get() or {}
+        count = get_search_index().rebuild(issues)
+        print(f"Indexed {count} issues in {SEARCH_INDEX_PATH} ({time.perf_counter() - started:.2f}s)")
+    else:
+        if args.sqlite:
+            conn = sqlite3.connect(args.sqlite)
+            conn.row_factory = sqlite3.Row
+            ensure_sqlite_issue_search(conn)
+            found = search_sqlite_issues(conn, args.query)
+        else:
+            found = get_search_index().search(args.query)
+        print(f"{found['total']} matches")
+        for result in found['results']:
+            print(f"[{result['status']}] {result['id']}  {result['title']}\n    {result['snippet']}")
@@ -0,0 +1,117 @@
+import base64
+import json
+import re
+from datetime import date, timedelta
+
+# Fields the /api/issues endpoint can return; "fields=" selects a subset
+ISSUE_API_FIELDS = ('id', 'title', 'subject', 'description', 'category', 'status', 'created_at',
+                    'updated_at', 'full_name', 'email', 'index_number', 'admin_response', 'user_id')
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+ISSUE_STATUSES = ('pending', 'in_progress', 'resolved')
+BULK_ACTIONS = ('status', 'respond', 'assign', 'delete')
+# Issues one bulk action may touch; keeps the multi-path update well under RTDB's size limits
+MAX_BULK_ISSUES = 500
+# RTDB push keys and SQLite row ids; ids become database paths, so nothing else is accepted
+RECORD_ID = re.compile(r'^[-_A-Za-z0-9]+$')
+
+def encode_cursor(cursor):
+    """Encode a (created_at, id) position as an opaque URL-safe string"""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode('utf-8')).decode('ascii')
+
+def decode_cursor(value):
+    """Decode a cursor made by encode_cursor; returns None if missing or malformed"""
+    if not value:
+        return None
+    try:
+        created_at, issue_id = json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+        return str(created_at), issue_id
+    except (ValueError, TypeError):
+        return None
+
+def parse_issue_filters(args):
+    """Read /api/issues query parameters into keyword arguments for a query.
+
+    "from" and "to" are inclusive dates (YYYY-MM-DD); "to" is turned into an
+    exclusive bound at the start of the following day.
+    """
+    filters = {
+        'status': args.get('status') or None,
+        'category': args.get('category') or None,
+        'student': (args.get('student') or '').strip() or None,
+        'cursor': decode_cursor(args.get('cursor')),
+        'date_from': None,
+        'date_to': None
+    }
+
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    filters['limit'] = max(1, min(limit, MAX_PAGE_SIZE))
+
+    try:
+        if args.get('from'):
+            filters['date_from'] = date.fromisoformat(args['from']).isoformat()
+        if args.get('to'):
+            filters['date_to'] = (date.fromisoformat(args['to']) + timedelta(days=1)).isoformat()
+    except ValueError:
+        raise ValueError('Dates must be in YYYY-MM-DD format') from None
+
+    return filters
+
+def parse_fields(value):
+    """Return the requested field names, or all fields when none are given"""
+    if not value:
+        return ISSUE_API_FIELDS
+    fields = [f.strip() for f in value.split(',') if f.strip() in ISSUE_API_FIELDS]
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def serialize_issue(issue, fields):
+    """Return the selected fields of an issue, filling title and subject from each other"""
+    issue = dict(issue)
+    issue.setdefault('title', issue.get('subject', ''))
+    issue.setdefault('subject', issue.get('title', ''))
+    return {field: issue.get(field) for field in fields}
+
+def parse_bulk_action(payload):
+    """Read a bulk issue action from a JSON object or form data.
+
+    Returns {'action', 'ids', 'status', 'response', 'assignee'} with ids
+    de-duplicated in order. Raises ValueError describing the first problem.
+    """
+    action = payload.get('action')
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"action must be one of {', '.join(BULK_ACTIONS)}")
+
+    ids = payload.getlist('ids') if hasattr(payload, 'getlist') else payload.get('ids')
+    if not isinstance(ids, list):
+        raise ValueError('ids must be a list of issue ids')
+    ids = list(dict.fromkeys(str(issue_id).strip() for issue_id in ids if str(issue_id).strip()))
+    if not ids:
+        raise ValueError('Select at least one issue')
+    if len(ids) > MAX_BULK_ISSUES:
+        raise ValueError(f'At most {MAX_BULK_ISSUES} issues can be changed at once')
+    if not all(RECORD_ID.match(issue_id) for issue_id in ids):
+        raise ValueError('ids must be issue ids')
+
+    bulk = {
+        'action': action,
+        'ids': ids,
+        'status': payload.get('status') or None,
+        'response': (payload.get('response') or '').strip() or None,
+        'assignee': (payload.get('assignee') or '').strip() or None
+    }
+    if action == 'status' and bulk['status'] not in ISSUE_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(ISSUE_STATUSES)}")
+    if action == 'respond' and not bulk['response']:
+        raise ValueError('Enter a response')
+    if bulk['assignee'] and not RECORD_ID.match(bulk['assignee']):
+        raise ValueError('assignee must be a user id')
+    return bulk
@@ -0,0 +1,184 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Seconds between sweeps of refilled buckets out of a shared SQLite store
+BUCKET_PRUNE_INTERVAL = 60
+
+def full_at(tokens, now, capacity, refill_per_second):
+    """Return when a bucket holding tokens at now will have refilled to capacity"""
+    return now + (capacity - tokens) / refill_per_second
+
+class MemoryBucketStore:
+    """Token buckets and counters kept in this worker process only"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill_per_second, now=None):
+        """Take one token from the bucket at key; returns seconds to wait, 0 if allowed"""
+        now = now or time.time()
+        with self.lock:
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / refill_per_second
+            # Each bucket records when it is full again, since IP and account
+            # buckets refill at different rates
+            self.buckets[key] = (tokens, now, full_at(tokens, now, capacity, refill_per_second))
+            if len(self.buckets) > self.max_keys:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        self.buckets = {k: v for k, v in self.buckets.items() if v[2] > now}
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def get_counters(self):
+        with self.lock:
+            return dict(self.counters)
+
+class SQLiteBucketStore:
+    """Token buckets and counters shared by every worker through a local SQLite file"""
+
+    def __init__(self, path, prune_interval=BUCKET_PRUNE_INTERVAL):
+        self.path = path
+        self.prune_interval = prune_interval
+        self.next_prune = 0
+        self.local = threading.local()
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS throttle_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                full_at REAL NOT NULL DEFAULT 0
+            )
+        ''')
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(throttle_buckets)')]
+        if 'full_at' not in columns:
+            # Stores created before full_at; their rows are pruned on the next sweep
+            conn.execute('ALTER TABLE throttle_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_throttle_buckets_full_at ON throttle_buckets(full_at)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS throttle_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        # A connection opened before a preloading server forked must not be reused
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def take(self, key, capacity, refill_per_second, now=None):
+        """Take one token from the bucket at key; returns seconds to wait, 0 if allowed"""
+        now = now or time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM throttle_buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / refill_per_second
+            conn.execute('INSERT OR REPLACE INTO throttle_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                         (key, tokens, now, full_at(tokens, now, capacity, refill_per_second)))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if now >= self.next_prune:
+            self.prune(now)
+        return wait
+
+    def prune(self, now=None):
+        """Delete buckets that have refilled completely; returns how many"""
+        now = now or time.time()
+        self.next_prune = now + self.prune_interval
+        return self._connection().execute('DELETE FROM throttle_buckets WHERE full_at <= ?', (now,)).rowcount
+
+    def increment(self, name, amount=1):
+        conn = self._connection()
+        conn.execute('''
+            INSERT INTO throttle_counters (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        ''', (name, amount))
+
+    def get_counters(self):
+        rows = self._connection().execute('SELECT name, value FROM throttle_counters').fetchall()
+        return dict(rows)
+
+class LoginThrottle:
+    """Token-bucket throttling of login attempts per client IP and per account.
+
+    Checked before the user is fetched or a password hash is verified, so a
+    credential-stuffing burst is rejected without touching Firebase or
+    spending CPU on the hash.
+    """
+
+    def __init__(self, store=None, ip_burst=20, ip_per_minute=10, account_burst=5, account_per_minute=2):
+        self.store = store or MemoryBucketStore()
+        self.ip_burst = ip_burst
+        self.ip_rate = ip_per_minute / 60.0
+        self.account_burst = account_burst
+        self.account_rate = account_per_minute / 60.0
+
+    def check(self, ip, account):
+        """Return (allowed, retry_after_seconds) for a login attempt"""
+        wait = self.store.take(f'ip:{ip}', self.ip_burst, self.ip_rate)
+        if wait:
+            self.store.increment('throttled_ip')
+            return False, wait
+
+        wait = self.store.take(f'account:{account}', self.account_burst, self.account_rate)
+        if wait:
+            self.store.increment('throttled_account')
+            return False, wait
+
+        self.store.increment('allowed')
+        return True, 0
+
+    def get_counters(self):
+        """Return counters for allowed and throttled attempts"""
+        counters = {'allowed': 0, 'throttled_ip': 0, 'throttled_account': 0}
+        counters.update(self.store.get_counters())
+        return counters
+
+def create_login_throttle():
+    """Build a LoginThrottle from LOGIN_THROTTLE_* environment variables.
+
+    Set LOGIN_THROTTLE_STORE to a file path to share buckets across workers;
+    the default keeps them in each worker's memory.
+    """
+    store_path = os.environ.get('LOGIN_THROTTLE_STORE', 'memory')
+    store = MemoryBucketStore() if store_path == 'memory' else SQLiteBucketStore(store_path)
+    return LoginThrottle(
+        store=store,
+        ip_burst=int(os.environ.get('LOGIN_THROTTLE_IP_BURST', 20)),
+        ip_per_minute=float(os.environ.get('LOGIN_THROTTLE_IP_PER_MINUTE', 10)),
+        account_burst=int(os.environ.get('LOGIN_THROTTLE_ACCOUNT_BURST', 5)),
+        account_per_minute=float(os.environ.get('LOGIN_THROTTLE_ACCOUNT_PER_MINUTE', 2))
+    )
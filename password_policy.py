@@ -0,0 +1,72 @@
+import os
+import time
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+# Lower the cost to save login CPU, raise it for security; run
+# `python password_policy.py --benchmark` to measure before changing it.
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+
+_method_prefixes = {}
+
+def _method_prefix(method):
+    """Return the method part Werkzeug writes in front of hashes made with method"""
+    if method not in _method_prefixes:
+        # Werkzeug fills in default parameters ("pbkdf2" -> "pbkdf2:sha256:N"),
+        # so ask it instead of parsing the policy string ourselves
+        _method_prefixes[method] = generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+    return _method_prefixes[method]
+
+def hash_password(password, method=None):
+    """Hash a password with the current policy"""
+    return generate_password_hash(password, method=method or PASSWORD_HASH_METHOD,
+                                  salt_length=PASSWORD_SALT_LENGTH)
+
+def needs_rehash(password_hash):
+    """Check whether a stored hash was made with a different policy"""
+    return password_hash.split('$', 1)[0] != _method_prefix(PASSWORD_HASH_METHOD)
+
+def verify_password(password_hash, password):
+    """Check a password; returns (valid, upgraded_hash or None)"""
+    if not password_hash or not check_password_hash(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash):
+        return True, hash_password(password)
+    return True, None
+
+def benchmark(methods=None, seconds=1.0):
+    """Measure hashes per second on one core for each method"""
+    methods = methods or [PASSWORD_HASH_METHOD]
+    results = []
+    for method in methods:
+        count = 0
+        started = time.perf_counter()
+        while True:
+            generate_password_hash('benchmark-password', method=method, salt_length=PASSWORD_SALT_LENGTH)
+            count += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= seconds:
+                break
+        results.append({
+            'method': _method_prefix(method),
+            'hashes_per_second_per_core': count / elapsed,
+            'ms_per_hash': elapsed / count * 1000
+        })
+    return results
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Password hashing policy tools')
+    parser.add_argument('--benchmark', action='store_true', help='measure hashing throughput')
+    parser.add_argument('--method', action='append', help='method to benchmark (repeatable); defaults to the policy')
+    parser.add_argument('--seconds', type=float, default=1.0, help='time spent on each method')
+    args = parser.parse_args()
+
+    print(f"Current policy: {_method_prefix(PASSWORD_HASH_METHOD)}")
+    if args.benchmark:
+        cores = os.cpu_count() or 1
+        for result in benchmark(args.method, args.seconds):
+            print(f"{result['method']:<28} {result['hashes_per_second_per_core']:8.1f} hashes/s/core "
+                  f"{result['ms_per_hash']:8.2f} ms/hash  ~{result['hashes_per_second_per_core'] * cores:.0f} logins/s on {cores} cores")
@@ -1,6 +1,6 @@
 import os
 import sqlite3
-from werkzeug.security import generate_password_hash
+from password_policy import hash_password
 from flask import Flask, render_template, request, redirect, url_for, session, flash, g
 
 # Initialize database first
@@ -111,7 +111,7 @@ def setup_db():
     cursor.execute('INSERT INTO index_prefixes (prefix, description) VALUES (?, ?)', ('CS', 'Computer Science'))
     
     # Create admin user
-    admin_password = generate_password_hash('admin123')
+    admin_password = hash_password('admin123')
     cursor.execute('''
         INSERT INTO users (username, email, full_name, index_number, level, gender, password, role, is_verified, is_active)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
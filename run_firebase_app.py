@@ -25,10 +25,12 @@ def main():
         from flask import Flask, render_template, request, redirect, url_for, session, flash, g
         from werkzeug.security import check_password_hash, generate_password_hash
         from datetime import datetime, timedelta
+        from static_assets import init_static_assets
         
         # Create Flask app
         app = Flask(__name__)
         app.secret_key = "firebase-student-report-system-secret-key"
+        init_static_assets(app)
         
         # Firebase Auth helper
         class FirebaseAuth:
@@ -2,10 +2,17 @@ import os
 import sqlite3
 from datetime import datetime
 from flask import Flask, render_template, request, redirect, url_for, session, flash, g
-from werkzeug.security import check_password_hash, generate_password_hash
+from password_policy import hash_password, verify_password
+from user_cache import UserProfileCache
+from static_assets import init_static_assets
+from fragment_cache import init_fragment_cache
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+init_static_assets(app)
+init_fragment_cache(app)
+
+profile_cache = UserProfileCache()
 
 def get_db_connection():
     conn = sqlite3.connect('university_issues.db')
@@ -70,15 +77,19 @@ def init_db():
     conn.commit()
     conn.close()
 
+def fetch_user_by_id(user_id):
+    conn = get_db_connection()
+    user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+    conn.close()
+    return user
+
 @app.before_request
 def load_logged_in_user():
     user_id = session.get('user_id')
-    if user_id is None:
+    if user_id is None or request.endpoint == 'static':
         g.user = None
     else:
-        conn = get_db_connection()
-        g.user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        conn.close()
+        g.user = profile_cache.load(user_id, lambda: fetch_user_by_id(user_id))
 
 @app.route('/')
 def index():
@@ -94,9 +105,15 @@ def login():
 
         conn = get_db_connection()
         user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+
+        valid, upgraded_hash = verify_password(user['password'], password) if user else (False, None)
+        if valid and upgraded_hash:
+            # Stored hash predates the current policy; upgrade it in place
+            conn.execute('UPDATE users SET password = ? WHERE id = ?', (upgraded_hash, user['id']))
+            conn.commit()
         conn.close()
 
-        if user and check_password_hash(user['password'], password):
+        if valid:
             session['user_id'] = user['id']
             flash('Login successful!', 'success')
             return redirect(url_for('dashboard'))
@@ -140,7 +157,7 @@ def register():
                 return render_template('register.html')
 
             # Create new user
-            password_hash = generate_password_hash(password)
+            password_hash = hash_password(password)
             conn.execute('''
                 INSERT INTO users (username, email, full_name, index_number, level, gender, password, is_verified)
                 VALUES (?, ?, ?, ?, ?, ?, ?, 1)
@@ -1,8 +1,12 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash
 import os
+from static_assets import init_static_assets
+from fragment_cache import init_fragment_cache
 
 app = Flask(__name__)
 app.secret_key = "firebase-student-report-system-key"
+init_static_assets(app)
+init_fragment_cache(app)
 
 @app.route('/')
 def index():
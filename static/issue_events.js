@@ -0,0 +1,61 @@
+// Live issue updates for the admin dashboards, pushed by /admin/events.
+// Pages patch their tables and counters in place instead of reloading.
+
+const ISSUE_STATUS_BADGES = {
+    pending: '<span class="badge bg-warning">Pending</span>',
+    in_progress: '<span class="badge bg-info">In Progress</span>',
+    resolved: '<span class="badge bg-success">Resolved</span>'
+};
+
+// handlers maps 'issue-created', 'issue-status' and 'issue-deleted' to
+// functions of (issue, previousStatus); 'resync' runs when events were
+// missed and defaults to reloading the page.
+function watchIssueEvents(handlers) {
+    if (!window.EventSource) return;
+    let source = null;
+
+    function connect() {
+        source = new EventSource('/admin/events');
+        for (const type of ['issue-created', 'issue-status', 'issue-deleted']) {
+            source.addEventListener(type, event => {
+                const data = JSON.parse(event.data);
+                updateIssueCounters(type, data.issue, data.previous_status);
+                if (handlers[type]) handlers[type](data.issue, data.previous_status);
+            });
+        }
+        source.addEventListener('resync', () => {
+            source.close();
+            (handlers.resync || (() => location.reload()))();
+        });
+        source.onerror = () => {
+            // EventSource reconnects by itself unless the server refused the stream
+            if (source.readyState === EventSource.CLOSED) setTimeout(connect, 30000);
+        };
+    }
+    connect();
+}
+
+// Counters are elements with data-stat="total" or data-stat="<status>"
+function adjustIssueCounter(name, delta) {
+    if (!name) return;
+    document.querySelectorAll(`[data-stat="${name}"]`).forEach(counter => {
+        counter.textContent = Math.max(0, (parseInt(counter.textContent, 10) || 0) + delta);
+    });
+}
+
+function updateIssueCounters(type, issue, previousStatus) {
+    if (type === 'issue-created') {
+        adjustIssueCounter('total', 1);
+        adjustIssueCounter(issue.status, 1);
+    } else if (type === 'issue-status') {
+        adjustIssueCounter(previousStatus, -1);
+        adjustIssueCounter(issue.status, 1);
+    } else if (type === 'issue-deleted') {
+        adjustIssueCounter('total', -1);
+        adjustIssueCounter(issue.status, -1);
+    }
+}
+
+function findIssueRow(container, issueId) {
+    return container.querySelector(`tr[data-issue-id="${CSS.escape(String(issueId))}"]`);
+}
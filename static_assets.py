@@ -0,0 +1,276 @@
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+from flask import request, url_for
+from markupsafe import Markup, escape
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Hashed files never change under the same name, so browsers may keep them for a year
+ASSET_MAX_AGE = 365 * 24 * 3600
+HASH_LENGTH = 10
+HASHED_NAME = re.compile(r'\.[0-9a-f]{%d}\.[A-Za-z0-9]+$' % HASH_LENGTH)
+
+ASSET_EXTENSIONS = ('.css', '.js', '.svg', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico',
+                    '.woff', '.woff2', '.ttf')
+# Written next to the hashed file as .gz/.br for nginx gzip_static/brotli_static
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg')
+
+# Third-party bundles; vendor_assets.py self-hosts them, the CDN is the fallback until it has run
+BOOTSTRAP_VERSION = '5.3.0'
+FONTAWESOME_VERSION = '6.4.0'
+CHARTJS_VERSION = '4.4.0'
+VENDOR_CDN = {
+    'vendor/css/bootstrap.min.css': f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/css/bootstrap.min.css',
+    'vendor/js/bootstrap.bundle.min.js': f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/js/bootstrap.bundle.min.js',
+    'vendor/css/fontawesome.min.css': f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{FONTAWESOME_VERSION}/css/all.min.css',
+    'vendor/js/chart.umd.min.js': f'https://cdn.jsdelivr.net/npm/chart.js@{CHARTJS_VERSION}/dist/chart.umd.js',
+}
+
+# Variants written by image_assets.py: ktu-logo-96w.webp is ktu-logo.* at 96px wide
+IMAGE_VARIANT = re.compile(r'^(.+)-(\d+)w\.(avif|webp|png|jpg)$')
+IMAGE_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'png': 'image/png', 'jpg': 'image/jpeg'}
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+def minify_css(text):
+    """Strip comments and layout whitespace from a stylesheet"""
+    text = CSS_COMMENT.sub('', text)
+    text = re.sub(r'\s+', ' ', text)
+    # Spaces around + and - are kept: calc() needs them
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r'([;{]\s*[-\w]+)\s*:\s*', r'\1:', text)
+    text = text.replace(';}', '}')
+    return text.strip()
+
+def minify_svg(text):
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    text = re.sub(r'>\s+<', '><', text)
+    return text.strip()
+
+def minify_js(text):
+    # Without a real tokenizer stripping JS is unsafe, so only minify when rjsmin is installed
+    return rjsmin.jsmin(text) if rjsmin is not None else text
+
+MINIFIERS = {'.css': minify_css, '.svg': minify_svg, '.js': minify_js}
+
+def hashed_name(path, data):
+    """style.css -> style.<first HASH_LENGTH hex digits of its sha256>.css"""
+    root, ext = posixpath.splitext(path)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+def rewrite_css_urls(text, source, manifest):
+    """Point url() references at the hashed copies of other assets"""
+    source_dir = posixpath.dirname(source)
+
+    def replace(match):
+        ref = match.group(2)
+        if re.match(r'^(data:|[a-z]+:|//|#)', ref):
+            return match.group(0)
+        path, _, suffix = ref.partition('?')
+        target = posixpath.normpath(posixpath.join(source_dir, path)).lstrip('/')
+        if target not in manifest:
+            return match.group(0)
+        hashed = posixpath.relpath(manifest[target], posixpath.join(DIST_DIR, source_dir))
+        return f'url({hashed})'
+    return CSS_URL.sub(replace, text)
+
+def source_files(static_dir):
+    """Yield static paths relative to static_dir, skipping previous build output"""
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == '.':
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in sorted(files):
+            if name.lower().endswith(ASSET_EXTENSIONS):
+                yield posixpath.normpath(posixpath.join(rel_root.replace(os.sep, '/'), name))
+
+def write_asset(static_dir, source, data, manifest):
+    """Write data under its content hash in dist/ and record it in manifest"""
+    target = posixpath.join(DIST_DIR, hashed_name(source, data))
+    output = os.path.join(static_dir, *target.split('/'))
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    if not os.path.exists(output):
+        with open(output, 'wb') as f:
+            f.write(data)
+        if output.endswith(PRECOMPRESS_EXTENSIONS):
+            with open(output + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(output + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+    manifest[source] = target
+    return target
+
+def load_manifest(static_dir=STATIC_DIR):
+    """Get {source path: hashed path}; empty when assets have not been built"""
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Error reading static asset manifest: {e}")
+        return {}
+
+def save_manifest(manifest, static_dir=STATIC_DIR):
+    path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Replace atomically so a running app never reads half a manifest
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def build_assets(static_dir=STATIC_DIR):
+    """Minify and fingerprint every static asset; returns the new manifest.
+
+    Non-CSS files are hashed first so stylesheets can reference their
+    hashed names. Output from earlier builds is kept, so pages rendered
+    before a deploy still find the files they reference.
+    """
+    manifest = load_manifest(static_dir)
+    sources = list(source_files(static_dir))
+    sources.sort(key=lambda path: path.endswith('.css'))
+    for source in sources:
+        with open(os.path.join(static_dir, *source.split('/')), 'rb') as f:
+            data = f.read()
+        ext = posixpath.splitext(source)[1].lower()
+        if ext in MINIFIERS:
+            text = data.decode('utf-8')
+            if ext == '.css':
+                text = rewrite_css_urls(text, source, manifest)
+            data = MINIFIERS[ext](text).encode('utf-8')
+        write_asset(static_dir, source, data, manifest)
+    save_manifest(manifest, static_dir)
+    return manifest
+
+def clean_assets(manifest, static_dir=STATIC_DIR):
+    """Remove hashed files the manifest no longer references; returns how many"""
+    keep = set(manifest.values())
+    removed = 0
+    dist = os.path.join(static_dir, DIST_DIR)
+    for root, _, files in os.walk(dist):
+        for name in files:
+            path = posixpath.relpath(posixpath.join(root.replace(os.sep, '/'), name),
+                                     static_dir.replace(os.sep, '/'))
+            base = re.sub(r'\.(gz|br)$', '', path)
+            if HASHED_NAME.search(base) and base not in keep:
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return removed
+
+def image_variants(manifest):
+    """Group image variants in the manifest as {root: {format: [(width, hashed path)]}}"""
+    variants = {}
+    for source, target in manifest.items():
+        match = IMAGE_VARIANT.match(source)
+        if match:
+            root, width, fmt = match.group(1), int(match.group(2)), match.group(3)
+            variants.setdefault(root, {}).setdefault(fmt, []).append((width, target))
+    for formats in variants.values():
+        for widths in formats.values():
+            widths.sort()
+    return variants
+
+def render_picture(variants, filename, alt, sizes=None, **attrs):
+    """Build <picture> markup for filename, or a plain <img> when it has no variants.
+
+    attrs become <img> attributes; pass class_ for class. sizes defaults to
+    the width attribute, which is right for images with a fixed CSS size.
+    """
+    if 'class_' in attrs:
+        attrs['class'] = attrs.pop('class_')
+    if sizes is None and attrs.get('width'):
+        sizes = f"{attrs['width']}px"
+    formats = variants.get(posixpath.splitext(filename)[0])
+
+    def srcset(widths):
+        return ', '.join(f"{url_for('static', filename=target)} {width}w" for width, target in widths)
+
+    def attributes(values):
+        return ''.join(f' {name}="{escape(value)}"' for name, value in values.items() if value is not None)
+
+    if not formats:
+        return Markup(f"<img{attributes({'src': url_for('static', filename=filename), 'alt': alt, **attrs})}>")
+
+    fallback = 'png' if 'png' in formats else 'jpg'
+    sources = ''.join(f"<source{attributes({'type': IMAGE_TYPES[fmt], 'srcset': srcset(formats[fmt]), 'sizes': sizes})}>"
+                      for fmt in ('avif', 'webp') if fmt in formats)
+    img = {'src': url_for('static', filename=formats[fallback][-1][1]), 'srcset': srcset(formats[fallback]),
+           'sizes': sizes, 'alt': alt, 'decoding': 'async', **attrs}
+    return Markup(f'<picture>{sources}<img{attributes(img)}></picture>')
+
+def init_static_assets(app):
+    """Serve built assets under their hashed names with immutable caching.
+
+    Replaces url_for in templates so url_for('static', filename='style.css')
+    returns the hashed file when the manifest lists it, and the plain file
+    otherwise (e.g. before the first build in development). vendor_url()
+    does the same for VENDOR_CDN bundles, falling back to the CDN, and
+    picture() renders the responsive variants built by image_assets.py.
+    """
+    manifest = load_manifest(app.static_folder)
+
+    def asset_url_for(endpoint, **values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.get(values['filename'], values['filename'])
+        return url_for(endpoint, **values)
+
+    def vendor_url(path):
+        if path in manifest:
+            return url_for('static', filename=manifest[path])
+        return VENDOR_CDN[path]
+
+    variants = image_variants(manifest)
+
+    def picture(filename, alt='', sizes=None, **attrs):
+        return render_picture(variants, filename, alt, sizes, **attrs)
+
+    def cache_hashed_assets(response):
+        filename = (request.view_args or {}).get('filename', '')
+        if request.endpoint == 'static' and response.status_code in (200, 304) and HASHED_NAME.search(filename):
+            response.cache_control.public = True
+            response.cache_control.max_age = ASSET_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+    app.jinja_env.globals['url_for'] = asset_url_for
+    app.jinja_env.globals['vendor_url'] = vendor_url
+    app.jinja_env.globals['picture'] = picture
+    app.after_request(cache_hashed_assets)
+    app.extensions['static_manifest'] = manifest
+    return app
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Minify and fingerprint files in static/')
+    parser.add_argument('command', choices=['build', 'clean'],
+                        help='build: write static/dist and its manifest; clean: also drop stale hashed files')
+    args = parser.parse_args()
+
+    manifest = build_assets()
+    for source, target in sorted(manifest.items()):
+        raw = os.path.getsize(os.path.join(STATIC_DIR, *source.split('/'))) \
+            if os.path.exists(os.path.join(STATIC_DIR, *source.split('/'))) else 0
+        built = os.path.getsize(os.path.join(STATIC_DIR, *target.split('/')))
+        print(f"{source:<32} -> {target:<44} {raw / 1024:7.1f} KB -> {built / 1024:7.1f} KB")
+    if args.command == 'clean':
+        print(f"Removed {clean_assets(manifest)} stale files")
@@ -0,0 +1,206 @@
+"""Create student accounts in bulk from a CSV file.
+
+    python student_import.py students.csv [--dry-run]
+
+Admins upload the same file at /admin/import-students. The header row
+must name email, full_name and index_number columns; a password column is
+optional, and students whose password is blank get a generated one that
+is reported back once. Rows are validated in a single pass over the
+stream (institutional email, an active index prefix, no duplicates in the
+file or among existing users), passwords are hashed on every core, and
+the accounts are written in batched multi-path updates.
+
+Imported accounts are created verified: the admin vouches for them, and
+the sweeper would otherwise reclaim them as abandoned sign-ups.
+"""
+import csv
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from password_policy import hash_password
+
+INSTITUTION_EMAIL_DOMAIN = '@ktu.edu.gh'
+IMPORT_COLUMNS = ('email', 'full_name', 'index_number', 'password')
+REQUIRED_COLUMNS = ('email', 'full_name', 'index_number')
+
+# Accounts per multi-path update
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+# Processes hashing passwords; scrypt is CPU bound, so one per core
+IMPORT_HASH_WORKERS = int(os.environ.get('IMPORT_HASH_WORKERS', os.cpu_count() or 1))
+MAX_IMPORT_ROWS = int(os.environ.get('MAX_IMPORT_ROWS', 20000))
+
+def column_name(header):
+    """Normalize a CSV header: "Full Name" and "full-name" both become full_name"""
+    return '_'.join((header or '').strip().lower().replace('-', ' ').split())
+
+def read_students(lines, prefixes, existing_emails=(), existing_index_numbers=()):
+    """Validate CSV rows in one pass over lines (any iterable of text lines).
+
+    Returns (students, errors). Students are dicts with the line number,
+    email, full_name, index_number and password (possibly blank); errors
+    are {'line', 'email', 'error'} dicts, one per rejected row.
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return [], [{'line': 1, 'email': '', 'error': 'The file is empty'}]
+    columns = [column_name(name) for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        return [], [{'line': 1, 'email': '', 'error': f"Missing column(s): {', '.join(missing)}"}]
+    position = {name: columns.index(name) for name in IMPORT_COLUMNS if name in columns}
+
+    prefixes = tuple(prefix.upper() for prefix in prefixes)
+    existing_emails = set(existing_emails)
+    existing_index_numbers = set(existing_index_numbers)
+    file_emails, file_index_numbers = set(), set()
+    students, errors = [], []
+
+    for line, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        if len(students) + len(errors) >= MAX_IMPORT_ROWS:
+            errors.append({'line': line, 'email': '',
+                           'error': f'Stopped reading: at most {MAX_IMPORT_ROWS} rows per import'})
+            break
+
+        def value(name):
+            index = position.get(name)
+            return row[index].strip() if index is not None and index < len(row) else ''
+
+        email = value('email').lower()
+        full_name = ' '.join(value('full_name').split())
+        index_number = value('index_number').upper()
+
+        if not email or not full_name or not index_number:
+            error = 'email, full_name and index_number are required'
+        elif not email.endswith(INSTITUTION_EMAIL_DOMAIN) or email.count('@') != 1:
+            error = f'Email must end with {INSTITUTION_EMAIL_DOMAIN}'
+        elif not email[:-len(INSTITUTION_EMAIL_DOMAIN)] or len(email.split()) != 1:
+            error = f'Email needs a name before {INSTITUTION_EMAIL_DOMAIN} and no spaces'
+        elif not prefixes:
+            error = 'No index number prefixes are active'
+        elif not index_number.startswith(prefixes):
+            error = f"Index number must start with one of: {', '.join(prefixes)}"
+        elif email in existing_emails:
+            error = 'Email already registered'
+        elif index_number in existing_index_numbers:
+            error = 'Index number already registered'
+        elif email in file_emails:
+            error = 'Email repeated in the file'
+        elif index_number in file_index_numbers:
+            error = 'Index number repeated in the file'
+        else:
+            error = None
+
+        if error:
+            errors.append({'line': line, 'email': email, 'error': error})
+            continue
+        file_emails.add(email)
+        file_index_numbers.add(index_number)
+        students.append({'line': line, 'email': email, 'full_name': full_name,
+                         'index_number': index_number, 'password': value('password')})
+    return students, errors
+
+def hash_passwords(passwords, workers=IMPORT_HASH_WORKERS):
+    """Yield the hash of each password, in order, computed across worker processes"""
+    if workers <= 1 or len(passwords) < 2:
+        yield from map(hash_password, passwords)
+        return
+    # Forking a threaded web worker can copy held locks into the children
+    context = multiprocessing.get_context('spawn')
+    chunksize = max(1, min(50, len(passwords) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        yield from pool.map(hash_password, passwords, chunksize=chunksize)
+
+def import_students(firebase_db, students, batch_size=IMPORT_BATCH_SIZE, workers=IMPORT_HASH_WORKERS):
+    """Hash and write validated students batch by batch.
+
+    Yields a progress dict after each batch: {'created', 'failed',
+    'total', 'errors'}, where errors lists the rows of batches that could
+    not be written. Fills in generated passwords on students in place.
+    """
+    for student in students:
+        if not student['password']:
+            student['password'] = secrets.token_urlsafe(9)
+            student['generated_password'] = True
+
+    now = datetime.now().isoformat()
+    hashes = hash_passwords([student['password'] for student in students], workers)
+    created = failed = 0
+    for start in range(0, len(students), batch_size):
+        batch = students[start:start + batch_size]
+        users = [{
+            'email': student['email'],
+            'password': password_hash,
+            'full_name': student['full_name'],
+            'index_number': student['index_number'],
+            'role': 'student',
+            'is_verified': True,
+            'verified_at': now,
+            'created_at': now
+        } for student, password_hash in zip(batch, hashes)]
+
+        errors = []
+        if firebase_db.add_users(users) is None:
+            failed += len(batch)
+            errors = [{'line': student['line'], 'email': student['email'], 'error': 'Could not be saved'}
+                      for student in batch]
+        else:
+            created += len(batch)
+        yield {'created': created, 'failed': failed, 'total': len(students), 'errors': errors}
+
+def generated_credentials(students):
+    """Return [{'email', 'index_number', 'password'}] for students given a generated password"""
+    return [{'email': student['email'], 'index_number': student['index_number'], 'password': student['password']}
+            for student in students if student.get('generated_password')]
+
+def existing_accounts(firebase_db):
+    """Return (emails, index numbers) already in use, from one users read"""
+    users = firebase_db.get_all_users()
+    emails = {(user.get('email') or '').lower() for user in users}
+    index_numbers = {(user.get('index_number') or '').upper() for user in users}
+    return emails - {''}, index_numbers - {''}
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Create student accounts from a CSV file')
+    parser.add_argument('csv_file')
+    parser.add_argument('--dry-run', action='store_true', help='validate the file without creating accounts')
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=IMPORT_HASH_WORKERS, help='password hashing processes')
+    parser.add_argument('--credentials', help='write generated passwords to this CSV file')
+    args = parser.parse_args()
+
+    from firebase_config import RealtimeDB, initialize_firebase
+
+    if not initialize_firebase():
+        sys.exit(1)
+    firebase_db = RealtimeDB()
+
+    emails, index_numbers = existing_accounts(firebase_db)
+    with open(args.csv_file, encoding='utf-8-sig', newline='') as f:
+        students, errors = read_students(f, firebase_db.get_active_prefixes(), emails, index_numbers)
+    print(f"{len(students)} valid row(s), {len(errors)} rejected")
+
+    if not args.dry_run and students:
+        for progress in import_students(firebase_db, students, args.batch_size, args.workers):
+            errors += progress['errors']
+            print(f"Created {progress['created']}/{progress['total']}"
+                  + (f", {progress['failed']} failed" if progress['failed'] else ''))
+        credentials = generated_credentials(students)
+        if credentials:
+            path = args.credentials or os.path.splitext(args.csv_file)[0] + '-credentials.csv'
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['email', 'index_number', 'password'])
+                writer.writeheader()
+                writer.writerows(credentials)
+            print(f"Generated passwords for {len(credentials)} student(s) written to {path}")
+
+    for error in errors:
+        print(f"  line {error['line']}: {error['email'] or '-'}: {error['error']}")
@@ -0,0 +1,188 @@
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from event_stream import ISSUE_EVENTS_TTL_HOURS
+
+try:
+    import fcntl
+except ImportError:  # Windows; gunicorn doesn't run there either
+    fcntl = None
+
+# Verification codes issued by /register expire after this long
+VERIFICATION_TTL = timedelta(hours=24)
+
+DEFAULT_GRACE_HOURS = float(os.environ.get('SWEEPER_GRACE_HOURS', 24))
+DEFAULT_INTERVAL_HOURS = float(os.environ.get('SWEEPER_INTERVAL_HOURS', 6))
+DEFAULT_BATCH_SIZE = int(os.environ.get('SWEEPER_BATCH_SIZE', 500))
+# Live-update issue events expire hourly, so they are pruned more often than the full sweep runs
+ISSUE_EVENTS_PRUNE_MINUTES = float(os.environ.get('ISSUE_EVENTS_PRUNE_MINUTES', 10))
+# Seconds after startup before the first sweep, so restarts still sweep
+DEFAULT_START_DELAY = float(os.environ.get('SWEEPER_START_DELAY', 60))
+# Held by the one gunicorn worker that runs the sweeper
+SWEEPER_LOCK_FILE = os.environ.get('SWEEPER_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'ktu-sweeper.lock'))
+
+_lock_handle = None
+
+def sweep_expired_records(firebase_db, grace_hours=DEFAULT_GRACE_HOURS, dry_run=False,
+                          batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Delete expired email verifications and abandoned unverified accounts.
+
+    A verification is reclaimed once it has been expired for longer than the
+    grace period. Its user is reclaimed with it when the account is still
+    unverified and has never submitted an issue. Unverified accounts whose
+    verification record is already gone are picked up the same way once they
+    are older than the verification TTL plus the grace period. Live-update
+    issue events are reclaimed once they are older than ISSUE_EVENTS_TTL_HOURS.
+    """
+    now = now or datetime.now()
+    grace = timedelta(hours=grace_hours)
+    verification_cutoff = now - grace
+    account_cutoff = now - VERIFICATION_TTL - grace
+
+    report = {
+        'started_at': now.isoformat(),
+        'dry_run': dry_run,
+        'grace_hours': grace_hours,
+        'verifications': [],
+        'users': [],
+        'kept_users_with_issues': [],
+        'issue_events': 0,
+        'batches': 0
+    }
+
+    paths = []
+    candidate_users = {}
+
+    for verification in firebase_db.get_expired_verifications(verification_cutoff):
+        report['verifications'].append(verification['id'])
+        paths.append(f"email_verifications/{verification['id']}")
+        if verification.get('user_id'):
+            candidate_users[verification['user_id']] = None
+
+    unverified_users = {user['id']: user for user in firebase_db.get_unverified_users()}
+
+    for user_id, user in unverified_users.items():
+        if user.get('created_at', '') < account_cutoff.isoformat():
+            candidate_users[user_id] = user
+
+    for user_id in candidate_users:
+        user = unverified_users.get(user_id)
+        if user is None:
+            # Verified, already deleted, or never existed
+            continue
+        if firebase_db.user_has_issues(user_id):
+            report['kept_users_with_issues'].append(user_id)
+            continue
+        report['users'].append(user_id)
+        paths.append(f"users/{user_id}")
+
+    # Normally pruned every few minutes by start_issue_event_pruner; this catches cron-only setups
+    event_cutoff = now - timedelta(hours=ISSUE_EVENTS_TTL_HOURS)
+    issue_events = firebase_db.get_expired_issue_events(int(event_cutoff.timestamp() * 1000))
+    report['issue_events'] = len(issue_events)
+    paths += [f"issue_events/{event_id}" for event_id in issue_events]
+
+    if paths and not dry_run:
+        report['batches'] = firebase_db.delete_paths(paths, batch_size=batch_size)
+
+    report['finished_at'] = datetime.now().isoformat()
+    return report
+
+def print_report(report):
+    """Print a human readable summary of a sweep"""
+    action = 'Would reclaim' if report['dry_run'] else 'Reclaimed'
+    print(f"{action} {len(report['verifications'])} expired verification(s) "
+          f"and {len(report['users'])} abandoned unverified account(s) "
+          f"and {report['issue_events']} old issue event(s) "
+          f"(grace period {report['grace_hours']}h, {report['batches']} delete batch(es))")
+    if report['kept_users_with_issues']:
+        print(f"Kept {len(report['kept_users_with_issues'])} unverified account(s) that have submitted issues")
+
+def prune_issue_events(firebase_db, now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete issue events older than ISSUE_EVENTS_TTL_HOURS; returns how many"""
+    cutoff = (now or datetime.now()) - timedelta(hours=ISSUE_EVENTS_TTL_HOURS)
+    event_ids = firebase_db.get_expired_issue_events(int(cutoff.timestamp() * 1000))
+    if event_ids:
+        firebase_db.delete_paths([f"issue_events/{event_id}" for event_id in event_ids], batch_size=batch_size)
+    return len(event_ids)
+
+def start_issue_event_pruner(firebase_db, interval_minutes=ISSUE_EVENTS_PRUNE_MINUTES, stop_event=None):
+    """Prune old issue events periodically in a daemon thread; returns an Event that stops it"""
+    stop_event = stop_event or threading.Event()
+    if interval_minutes <= 0:
+        return stop_event
+
+    def run():
+        while not stop_event.wait(interval_minutes * 60):
+            try:
+                prune_issue_events(firebase_db)
+            except Exception as e:
+                print(f"Error pruning issue events: {e}")
+
+    thread = threading.Thread(target=run, name='issue-event-pruner', daemon=True)
+    thread.start()
+    return stop_event
+
+def start_sweeper(firebase_db, interval_hours=DEFAULT_INTERVAL_HOURS, grace_hours=DEFAULT_GRACE_HOURS,
+                  start_delay=DEFAULT_START_DELAY, stop_event=None):
+    """Run the sweeper periodically in a daemon thread; returns an Event that stops it"""
+    stop_event = stop_event or threading.Event()
+    if interval_hours <= 0:
+        return stop_event
+
+    def run():
+        delay = min(start_delay, interval_hours * 3600)
+        while not stop_event.wait(delay):
+            try:
+                print_report(sweep_expired_records(firebase_db, grace_hours=grace_hours))
+            except Exception as e:
+                print(f"Error sweeping expired records: {e}")
+            delay = interval_hours * 3600
+
+    thread = threading.Thread(target=run, name='ttl-sweeper', daemon=True)
+    thread.start()
+    return stop_event
+
+def start_sweeper_once(firebase_db, lock_file=SWEEPER_LOCK_FILE, interval_hours=DEFAULT_INTERVAL_HOURS,
+                       prune_minutes=ISSUE_EVENTS_PRUNE_MINUTES):
+    """Start the sweeper and issue event pruner unless another process on this host runs them.
+
+    Called by every gunicorn worker: the first to lock lock_file runs them
+    and holds the lock until it exits, when its replacement takes over.
+    Returns an Event that stops both, or None if they run elsewhere.
+    """
+    global _lock_handle
+    if (interval_hours <= 0 and prune_minutes <= 0) or _lock_handle is not None:
+        return None
+    if fcntl is not None:
+        try:
+            handle = open(lock_file, 'a')
+        except OSError:
+            return None
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return None
+        _lock_handle = handle
+    stop_event = start_sweeper(firebase_db, interval_hours=interval_hours)
+    return start_issue_event_pruner(firebase_db, prune_minutes, stop_event=stop_event)
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reclaim expired verifications and abandoned accounts')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be deleted without deleting')
+    parser.add_argument('--grace-hours', type=float, default=DEFAULT_GRACE_HOURS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from firebase_config import RealtimeDB, initialize_firebase
+
+    if not initialize_firebase():
+        sys.exit(1)
+
+    print_report(sweep_expired_records(RealtimeDB(), grace_hours=args.grace_hours,
+                                       dry_run=args.dry_run, batch_size=args.batch_size))
@@ -0,0 +1,91 @@
+import os
+import time
+from jinja2 import FileSystemBytecodeCache
+
+# Compiled templates shared by every worker and kept across restarts; Jinja
+# checks each entry against the template source, so edits invalidate it
+TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', '.jinja_cache')
+
+def init_template_cache(app, directory=TEMPLATE_CACHE_DIR):
+    """Make app's Jinja environment keep compiled templates in directory"""
+    if isinstance(app.jinja_env.bytecode_cache, FileSystemBytecodeCache):
+        return app
+    try:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    except OSError as e:
+        print(f"Template bytecode cache disabled, can't use {directory}: {e}")
+    return app
+
+def precompile_templates(app):
+    """Load every template so it is compiled (or read from the cache) up front.
+
+    Returns {name: milliseconds to load}; templates that fail to compile
+    are reported and skipped.
+    """
+    timings = {}
+    for name in app.jinja_env.list_templates():
+        started = time.perf_counter()
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            print(f"Error compiling template {name}: {e}")
+            continue
+        timings[name] = (time.perf_counter() - started) * 1000
+    return timings
+
+def template_report(app):
+    """Measure each template: source size, compile from source, load through the cache, render.
+
+    Rendering uses an empty context inside a test request, so it measures
+    the template's own overhead; templates that need real data to render
+    get their error instead of a time.
+    """
+    env = app.jinja_env
+    if env.cache is not None:
+        # Time the load through the bytecode cache, not the in-memory one
+        env.cache.clear()
+    loads = precompile_templates(app)
+    report = []
+    for name in sorted(loads):
+        source, filename, _ = env.loader.get_source(env, name)
+        started = time.perf_counter()
+        env.compile(source, name, filename)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        render_ms, error = None, None
+        with app.test_request_context():
+            context = {}
+            app.update_template_context(context)
+            started = time.perf_counter()
+            try:
+                env.get_template(name).render(context)
+                render_ms = (time.perf_counter() - started) * 1000
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+        report.append({
+            'template': name,
+            'lines': source.count('\n') + 1,
+            'bytes': len(source.encode('utf-8')),
+            'compile_ms': compile_ms,
+            'load_ms': loads[name],
+            'render_ms': render_ms,
+            'error': error
+        })
+    report.sort(key=lambda row: row['compile_ms'], reverse=True)
+    return report
+
+def print_template_report(report):
+    print(f"{'template':<34} {'lines':>6} {'KB':>6} {'compile':>9} {'load':>8} {'render':>8}")
+    for row in report:
+        render = f"{row['render_ms']:6.1f}ms" if row['render_ms'] is not None else '       -'
+        print(f"{row['template']:<34} {row['lines']:>6} {row['bytes'] / 1024:6.1f} "
+              f"{row['compile_ms']:7.1f}ms {row['load_ms']:6.1f}ms {render}")
+    total_compile = sum(row['compile_ms'] for row in report)
+    total_load = sum(row['load_ms'] for row in report)
+    print(f"{len(report)} templates: {total_compile:.0f} ms to compile from source, {total_load:.0f} ms to load now")
+    failed = [row for row in report if row['error']]
+    if failed:
+        print("Not rendered without request data:")
+        for row in failed:
+            print(f"  {row['template']}: {row['error'][:100]}")
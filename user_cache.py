@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Touched whenever a cached profile may be stale (role change, deactivation,
+# deletion). Every worker compares its mtime to the one its entries were
+# loaded under, so one stat() per request replaces a users query.
+GENERATION_FILE = os.environ.get('USER_CACHE_GENERATION_FILE', '.user_profile_generation')
+
+PROFILE_FIELDS = ('id', 'username', 'email', 'full_name', 'role', 'is_verified', 'is_active')
+
+def current_generation(path=GENERATION_FILE):
+    """Return the shared profile generation"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def invalidate_user_profiles(path=GENERATION_FILE):
+    """Mark every cached profile in every worker as stale"""
+    now = max(time.time_ns(), current_generation(path) + 1)
+    with open(path, 'a'):
+        pass
+    os.utime(path, ns=(now, now))
+
+def profile_from_row(row):
+    """Build the minimal profile cached for a users row"""
+    keys = row.keys()
+    profile = {field: row[field] for field in PROFILE_FIELDS if field in keys}
+    profile.setdefault('is_active', True)
+    return profile
+
+class UserProfileCache:
+    """Per-worker LRU of logged-in user profiles, versioned by the shared generation"""
+
+    def __init__(self, max_entries=1024, ttl=300, generation_path=GENERATION_FILE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation_path = generation_path
+        self.generation = current_generation(generation_path)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached profile for key, or None if missing or stale"""
+        generation = current_generation(self.generation_path)
+        now = time.monotonic()
+        with self.lock:
+            if generation != self.generation:
+                self.entries.clear()
+                self.generation = generation
+                return None
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            profile, loaded_at = entry
+            if now - loaded_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return profile
+
+    def set(self, key, profile):
+        with self.lock:
+            self.entries[key] = (profile, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def load(self, key, loader):
+        """Return the profile for key, calling loader() for a users row on a miss"""
+        profile = self.get(key)
+        if profile is None:
+            row = loader()
+            if row is None:
+                return None
+            profile = profile_from_row(row)
+            self.set(key, profile)
+        return profile
@@ -0,0 +1,254 @@
+"""Self-host Bootstrap, FontAwesome and Chart.js as purged, hashed bundles.
+
+    python vendor_assets.py build [--offline]
+
+Downloads the pinned releases once into VENDOR_CACHE, removes Bootstrap
+and FontAwesome rules for classes no template uses, subsets the icon
+fonts to the referenced glyphs (when fontTools is installed) and writes
+everything to static/dist through the static asset manifest. Templates
+link them with vendor_url(), which falls back to the CDN until a build
+has run.
+"""
+import io
+import os
+import re
+import urllib.request
+
+from static_assets import (CSS_COMMENT, STATIC_DIR, VENDOR_CDN, load_manifest, rewrite_css_urls,
+                           save_manifest, write_asset)
+
+try:
+    from fontTools import subset as font_subset
+    from fontTools.ttLib import TTFont
+except ImportError:
+    font_subset = None
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+VENDOR_CACHE = os.environ.get('VENDOR_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.vendor_cache'))
+
+FONTAWESOME_WEBFONTS = os.path.dirname(VENDOR_CDN['vendor/css/fontawesome.min.css']).rsplit('/', 1)[0] + '/webfonts'
+# Icon font -> classes that select it; a font is shipped only when one is used
+FONTAWESOME_FONTS = {
+    'fa-solid-900.woff2': ('fa', 'fas', 'fa-solid'),
+    'fa-regular-400.woff2': ('far', 'fa-regular'),
+    'fa-brands-400.woff2': ('fab', 'fa-brands'),
+}
+
+# Classes Bootstrap's JavaScript adds at runtime, so they never appear in templates
+BOOTSTRAP_RUNTIME_CLASSES = {
+    'show', 'showing', 'hide', 'hiding', 'fade', 'collapse', 'collapsing', 'collapse-horizontal',
+    'active', 'disabled', 'modal-open', 'modal-backdrop', 'modal-static', 'offcanvas-backdrop',
+    'dropup', 'dropend', 'dropstart', 'dropdown-menu-end', 'dropdown-menu-start',
+    'tooltip', 'tooltip-inner', 'tooltip-arrow', 'popover', 'popover-arrow', 'popover-header',
+    'popover-body', 'was-validated', 'is-valid', 'is-invalid', 'carousel-item-next',
+    'carousel-item-prev', 'carousel-item-start', 'carousel-item-end', 'toast',
+}
+BOOTSTRAP_RUNTIME_PREFIXES = ('bs-tooltip-', 'bs-popover-')
+
+TOKEN = re.compile(r'[A-Za-z0-9_-]+')
+# alert-{{ category }} in Jinja or alert-${type} in JS: any class with that prefix may appear
+DYNAMIC_CLASS = re.compile(r'([A-Za-z0-9_-]+-)(?:\{\{(.*?)\}\}|\$\{)')
+# 'pause' if user.is_active else 'play' only ever yields its two literals
+CONDITIONAL_LITERALS = re.compile(r"""^\s*(['"])[\w-]+\1\s+if\s+.+\s+else\s+(['"])[\w-]+\2\s*$""")
+LITERAL = re.compile(r"""['"]([\w-]+)['"]""")
+SELECTOR_CLASS = re.compile(r'\.(-?[_a-zA-Z][_a-zA-Z0-9-]*)')
+NOT_PSEUDO = re.compile(r':not\([^)]*\)')
+ICON_CODEPOINT = re.compile(r'(?:content|--fa):\s*"\\([0-9a-fA-F]+)"')
+SOURCE_MAP = re.compile(r'\n?//# sourceMappingURL=\S+\s*$')
+
+def fetch(url, offline=False):
+    """Get url from VENDOR_CACHE, downloading it the first time"""
+    path = os.path.join(VENDOR_CACHE, re.sub(r'[^A-Za-z0-9._-]+', '_', url.split('://', 1)[-1]))
+    if not os.path.exists(path):
+        if offline:
+            raise SystemExit(f'{url} is not in {VENDOR_CACHE}; run once without --offline')
+        os.makedirs(VENDOR_CACHE, exist_ok=True)
+        with urllib.request.urlopen(url, timeout=60) as response:
+            data = response.read()
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+def scan_templates(paths=None):
+    """Collect every word in the templates plus prefixes of dynamically built classes.
+
+    Returns (tokens, prefixes). Matching words rather than parsing class
+    attributes keeps classes named in inline scripts and Jinja expressions.
+    """
+    if paths is None:
+        paths = [os.path.join(root, name) for root, _, files in os.walk(TEMPLATE_DIR)
+                 for name in files if name.endswith('.html')]
+    tokens, prefixes = set(), set()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        tokens.update(TOKEN.findall(text))
+        for match in DYNAMIC_CLASS.finditer(text):
+            prefix, expression = match.group(1), match.group(2)
+            if expression is not None:
+                tokens.update(prefix + literal for literal in LITERAL.findall(expression))
+                if CONDITIONAL_LITERALS.match(expression):
+                    continue
+            prefixes.add(prefix)
+    return tokens, prefixes
+
+def split_blocks(css):
+    """Split a stylesheet into top-level (prelude, body) pairs; body is None for @rules ending in ;"""
+    blocks, depth, start, prelude, quote = [], 0, 0, None, None
+    i = 0
+    while i < len(css):
+        char = css[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            if depth == 0:
+                prelude = css[start:i].strip()
+                start = i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i]))
+                start = i + 1
+        elif char == ';' and depth == 0:
+            blocks.append((css[start:i].strip(), None))
+            start = i + 1
+        i += 1
+    return blocks
+
+def split_selectors(prelude):
+    """Split a selector list on commas outside parentheses"""
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return [s.strip() for s in selectors if s.strip()]
+
+def purge_css(css, tokens, prefixes=()):
+    """Drop style rules whose selectors need a class that never appears in tokens"""
+    def used(selector):
+        classes = SELECTOR_CLASS.findall(NOT_PSEUDO.sub('', selector))
+        return all(c in tokens or c.startswith(prefixes) for c in classes)
+
+    output = []
+    for prelude, body in split_blocks(css):
+        if body is None:
+            output.append(prelude + ';')
+        elif prelude.startswith(('@media', '@supports', '@layer', '@container')):
+            inner = purge_css(body, tokens, prefixes)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            # @keyframes, @font-face and friends have no class selectors
+            output.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [s for s in split_selectors(prelude) if used(s)]
+            if selectors:
+                output.append(f"{','.join(selectors)}{{{body}}}")
+    return ''.join(output)
+
+def split_banner(css):
+    """Split off @charset and /*! license */ comments; returns (banner, comment-free css)"""
+    licenses = [c for c in CSS_COMMENT.findall(css) if c.startswith('/*!')]
+    css = CSS_COMMENT.sub('', css)
+    # @charset must stay the first thing in the file
+    charset = re.match(r'\s*@charset "[^"]*";', css)
+    if charset:
+        return charset.group(0).strip() + ''.join(licenses), css[charset.end():]
+    return ''.join(licenses), css
+
+def subset_font(data, codepoints):
+    """Keep only the glyphs for codepoints; returns data unchanged without fontTools"""
+    if font_subset is None or not codepoints:
+        return data
+    font = TTFont(io.BytesIO(data))
+    options = font_subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    output = io.BytesIO()
+    font.flavor = 'woff2'
+    font.save(output)
+    return output.getvalue()
+
+def build_fontawesome(tokens, prefixes, manifest, offline=False):
+    """Write the purged FontAwesome CSS and its subset fonts; returns the glyph count"""
+    source = 'vendor/css/fontawesome.min.css'
+    banner, css = split_banner(fetch(VENDOR_CDN[source], offline).decode('utf-8'))
+    css = purge_css(css, tokens, prefixes)
+
+    fonts = {name for name, classes in FONTAWESOME_FONTS.items() if tokens.intersection(classes)}
+
+    def keep_font_face(match):
+        referenced = set(re.findall(r'webfonts/([\w.-]+)', match.group(0)))
+        if not referenced.intersection(fonts):
+            return ''
+        # Every browser we support reads woff2; drop the .ttf fallbacks
+        return re.sub(r',url\([^)]*\.ttf\)\s*format\("truetype"\)', '', match.group(0))
+    css = re.sub(r'@font-face\{[^}]*\}', keep_font_face, css)
+
+    codepoints = {int(code, 16) for code in ICON_CODEPOINT.findall(css)}
+    for name in sorted(fonts):
+        data = fetch(f'{FONTAWESOME_WEBFONTS}/{name}', offline)
+        write_asset(STATIC_DIR, f'vendor/webfonts/{name}', subset_font(data, codepoints), manifest)
+
+    css = rewrite_css_urls(css, source, manifest)
+    write_asset(STATIC_DIR, source, (banner + css).encode('utf-8'), manifest)
+    return len(codepoints)
+
+def build_vendor(offline=False):
+    """Build every vendor bundle into static/dist and update the manifest"""
+    manifest = load_manifest()
+    tokens, prefixes = scan_templates()
+    tokens |= BOOTSTRAP_RUNTIME_CLASSES
+    prefixes = tuple(sorted(prefixes)) + BOOTSTRAP_RUNTIME_PREFIXES
+
+    sizes = {}
+    bootstrap_css = fetch(VENDOR_CDN['vendor/css/bootstrap.min.css'], offline).decode('utf-8')
+    sizes['vendor/css/bootstrap.min.css'] = len(bootstrap_css)
+    banner, css = split_banner(bootstrap_css)
+    write_asset(STATIC_DIR, 'vendor/css/bootstrap.min.css',
+                (banner + purge_css(css, tokens, prefixes)).encode('utf-8'), manifest)
+
+    for source in ('vendor/js/bootstrap.bundle.min.js', 'vendor/js/chart.umd.min.js'):
+        script = fetch(VENDOR_CDN[source], offline).decode('utf-8')
+        sizes[source] = len(script)
+        # The .map files are not shipped, so don't make browsers request them
+        write_asset(STATIC_DIR, source, SOURCE_MAP.sub('', script).encode('utf-8'), manifest)
+
+    sizes['vendor/css/fontawesome.min.css'] = len(fetch(VENDOR_CDN['vendor/css/fontawesome.min.css'], offline))
+    icons = build_fontawesome(tokens, prefixes, manifest, offline)
+    save_manifest(manifest)
+    return manifest, sizes, icons
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Self-host purged Bootstrap, FontAwesome and Chart.js bundles')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--offline', action='store_true', help=f'only use files already in {VENDOR_CACHE}')
+    args = parser.parse_args()
+
+    manifest, sizes, icons = build_vendor(args.offline)
+    for source, target in sorted(manifest.items()):
+        if not source.startswith('vendor/'):
+            continue
+        built = os.path.getsize(os.path.join(STATIC_DIR, *target.split('/')))
+        before = f"{sizes[source] / 1024:7.1f} KB -> " if source in sizes else ' ' * 14
+        print(f"{source:<36} -> {target:<52} {before}{built / 1024:7.1f} KB")
+    print(f"{icons} FontAwesome glyphs kept" + ('' if font_subset else ' (install fonttools to subset the fonts)'))
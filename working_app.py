@@ -1,8 +1,17 @@
+import time
+_import_started = time.perf_counter()
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import check_password_hash, generate_password_hash
+from flask import Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify
+import click
+from password_policy import hash_password, verify_password
 from datetime import datetime, timedelta
+import asyncio
+import csv
+import hmac
+import io
+import json
 import os
+from urllib.parse import unquote
 
 def parse_datetime(date_string):
     """Parse datetime string for template display"""
@@ -15,7 +24,18 @@ def parse_datetime(date_string):
         return str(date_string)
 
 # Firebase integration
-from firebase_config import RealtimeDB, initialize_firebase
+from firebase_config import RealtimeDB, attach_user_info, category_key, initialize_firebase
+from firebase_async import AsyncRealtimeDB
+from login_throttle import create_login_throttle
+from data_versions import check_not_modified, with_validators
+from issues_api import encode_cursor, parse_bulk_action, parse_fields, parse_issue_filters, serialize_issue
+from compression import init_compression
+from static_assets import init_static_assets
+from fragment_cache import init_fragment_cache
+from event_stream import event_stream_response, firebase_issue_listener, serves_one_request_at_a_time
+from student_import import existing_accounts, generated_credentials, import_students, read_students
+from template_cache import (init_template_cache, precompile_templates, print_template_report,
+                            template_report)
 
 app = Flask(__name__)
 app.secret_key = "student-report-system-firebase-secret-key"
@@ -27,63 +47,130 @@ def utility_processor():
         session=session
     )
 
-# Initialize Firebase and Database
-initialize_firebase()
-firebase_db = RealtimeDB()
-
-def init_default_users():
-    """Initialize default users if they don't exist"""
+# Set up by create_app; importing this module has no side effects
+firebase_db = None
+async_db = None
+login_throttle = None
+
+def create_app(config=None):
+    """Configure the app, connect to Firebase and return the app.
+
+    config is a mapping merged into app.config (e.g. SECRET_KEY, DEBUG,
+    TRUST_PROXY_HEADERS). Routes stay registered on the module-level app so
+    their endpoint names are unchanged; only the first call connects.
+    """
+    global firebase_db, async_db, login_throttle
+    if config:
+        app.config.from_mapping(config)
+    if firebase_db is not None:
+        return app
+
+    # Behind nginx every request comes from 127.0.0.1; trust X-Forwarded-For so
+    # login throttling sees the real client address
+    if app.config.get('TRUST_PROXY_HEADERS', os.environ.get('TRUST_PROXY_HEADERS')):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1)
+
+    init_compression(app)
+    init_static_assets(app)
+    init_template_cache(app)
+    init_fragment_cache(app)
+    login_throttle = create_login_throttle()
+
+    # Initialize Firebase and Database
+    initialize_firebase()
+    firebase_db = RealtimeDB()
+    # Used by the async views; connects lazily in each worker
+    async_db = AsyncRealtimeDB()
+    return app
+
+def warm_shared_state():
+    """Load read-only state once so preloaded gunicorn workers share it.
+
+    Compiles every template (through the shared bytecode cache, so only the
+    first boot after a deploy really compiles), builds the URL map and
+    imports the modules the views import lazily. Makes no network calls and opens no database
+    connections, so nothing unsafe is inherited across fork().
+    """
+    import email_utils
+    import sweeper
+    from data_versions import build_id
+    from password_policy import needs_rehash
+
+    timings = precompile_templates(app)
+    print(f"Loaded {len(timings)} templates in {sum(timings.values()):.0f} ms")
+    with app.test_request_context():
+        url_for('login')
+    build_id()
+    needs_rehash('')
+
+# Accounts created on first boot; later boots only read the seeding marker
+DEFAULT_USERS = (
+    {'email': 'admin@ktu.edu.gh', 'password': 'admin123', 'full_name': 'Super Admin', 'role': 'supa_admin'},
+    {'email': 'subadmin@ktu.edu.gh', 'password': 'subadmin123', 'full_name': 'Sub Admin', 'role': 'subadmin'},
+    {'email': 'student@ktu.edu.gh', 'password': 'student123', 'full_name': 'Test Student', 'role': 'student'},
+)
+
+def init_default_users(force=False):
+    """Initialize default users if they don't exist.
+
+    Runs the per-account checks only until meta/default_users_seeded is set,
+    so a normal restart costs one small read. force re-checks every account.
+    """
     try:
-        # Check if admin user exists
-        admin_user = firebase_db.get_user_by_email('admin@ktu.edu.gh')
-        if not admin_user:
-            admin_data = {
-                'email': 'admin@ktu.edu.gh',
-                'password': generate_password_hash('admin123'),
-                'full_name': 'Super Admin',
-                'role': 'supa_admin',
+        marker_ref = firebase_db.db_ref.child('meta').child('default_users_seeded')
+        if not force and marker_ref.get():
+            return
+
+        all_present = True
+        for account in DEFAULT_USERS:
+            if firebase_db.get_user_by_email(account['email']):
+                continue
+            user_data = {
+                'email': account['email'],
+                'password': hash_password(account['password']),
+                'full_name': account['full_name'],
+                'role': account['role'],
                 'is_verified': True,
                 'created_at': datetime.now().isoformat()
             }
-            user_id = firebase_db.add_user(admin_data)
-            if user_id:
-                print("Default admin user created successfully")
+            if firebase_db.add_user(user_data):
+                print(f"Default {account['role']} user created successfully")
             else:
-                print("Failed to create default admin user")
-
-        # Check if subadmin user exists
-        subadmin_user = firebase_db.get_user_by_email('subadmin@ktu.edu.gh')
-        if not subadmin_user:
-            subadmin_data = {
-                'email': 'subadmin@ktu.edu.gh',
-                'password': generate_password_hash('subadmin123'),
-                'full_name': 'Sub Admin',
-                'role': 'subadmin',
-                'is_verified': True,
-                'created_at': datetime.now().isoformat()
-            }
-            user_id = firebase_db.add_user(subadmin_data)
-            if user_id:
-                print("Default subadmin user created successfully")
-
-        # Check if student user exists
-        student_user = firebase_db.get_user_by_email('student@ktu.edu.gh')
-        if not student_user:
-            student_data = {
-                'email': 'student@ktu.edu.gh',
-                'password': generate_password_hash('student123'),
-                'full_name': 'Test Student',
-                'role': 'student',
-                'is_verified': True,
-                'created_at': datetime.now().isoformat()
-            }
-            user_id = firebase_db.add_user(student_data)
-            if user_id:
-                print("Default student user created successfully")
+                print(f"Failed to create default {account['role']} user")
+                all_present = False
+
+        if all_present:
+            marker_ref.set({'.sv': 'timestamp'})
 
     except Exception as e:
         print(f"Error initializing default users: {e}")
 
+@app.cli.command('seed')
+@click.option('--force', is_flag=True, help='Check every default account even if seeding already ran.')
+def seed_command(force):
+    """Create the default admin, subadmin and student accounts."""
+    started = time.perf_counter()
+    create_app()
+    init_default_users(force=force)
+    print(f"Seeding finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+@app.cli.command('sweep')
+@click.option('--dry-run', is_flag=True, help='Report what would be deleted without deleting.')
+def sweep_command(dry_run):
+    """Reclaim expired verifications, abandoned accounts and old issue events."""
+    from sweeper import print_report, sweep_expired_records
+    create_app()
+    print_report(sweep_expired_records(firebase_db, dry_run=dry_run))
+
+@app.cli.command('templates')
+def templates_command():
+    """Precompile every template into the bytecode cache and report its cost."""
+    init_static_assets(app)
+    init_template_cache(app)
+    init_fragment_cache(app)
+    print_template_report(template_report(app))
+
 @app.route('/')
 def index():
     return redirect(url_for('login'))
@@ -94,9 +181,22 @@ def login():
         email = request.form['email'].strip().lower()
         password = request.form['password']
 
+        allowed, retry_after = login_throttle.check(request.remote_addr, email)
+        if not allowed:
+            flash('Too many login attempts. Please wait a moment and try again.', 'danger')
+            response = app.make_response((render_template('login.html'), 429))
+            response.headers['Retry-After'] = str(int(retry_after) + 1)
+            return response
+
         user = firebase_db.get_user_by_email(email)
 
-        if user and check_password_hash(user['password'], password):
+        valid, upgraded_hash = verify_password(user['password'], password) if user else (False, None)
+
+        if valid:
+            if upgraded_hash:
+                # Stored hash predates the current policy; upgrade it in place
+                firebase_db.update_user(user['id'], {'password': upgraded_hash})
+
             session['user_id'] = user['id']
             session['user_email'] = user['email']
             session['user_role'] = user['role']
@@ -164,7 +264,7 @@ def register():
 
         user_data = {
             'email': email,
-            'password': generate_password_hash(password),
+            'password': hash_password(password),
             'full_name': full_name,
             'index_number': index_number,
             'role': 'student',
@@ -176,13 +276,12 @@ def register():
 
         if user_id:
             # Send verification email
-            from email_utils import send_verification_email, generate_verification_code
+            from email_utils import send_in_background, send_verification_email, generate_verification_code
             verification_code = generate_verification_code()
             
-            # Store verification code in Firebase
+            # Store verification code in Firebase, keyed by the email hash
             try:
-                verification_ref = firebase_db.db_ref.child('email_verifications')
-                verification_ref.push({
+                firebase_db.set_email_verification(email, {
                     'email': email,
                     'code': verification_code,
                     'user_id': user_id,
@@ -190,8 +289,12 @@ def register():
                     'created_at': datetime.now().isoformat()
                 })
                 
-                if send_verification_email(email, verification_code, full_name):
-                    flash('Registration successful! Please check your email for verification instructions.', 'success')
+                # Queued, not yet sent: failures are recorded for admins under email_failures
+                if send_in_background(send_verification_email, email, verification_code, full_name,
+                                      on_failure=lambda error: firebase_db.record_email_failure(
+                                          email, 'verification', error)):
+                    flash('Registration successful! We are sending a verification code to your email. '
+                          'If it has not arrived within a few minutes, contact support.', 'success')
                     return redirect(url_for('verify_email'))
                 else:
                     flash('Registration successful, but failed to send verification email. Please contact support.', 'warning')
@@ -206,12 +309,19 @@ def register():
     return render_template('register.html', prefixes=active_prefixes)
 
 @app.route('/student-dashboard')
-def student_dashboard():
+async def student_dashboard():
     if 'user_id' not in session:
         flash('Please login first.', 'danger')
         return redirect(url_for('login'))
 
-    issues = firebase_db.get_issues(user_id=session['user_id'])
+    # The per-user index is small, so fetch it alongside the version check
+    # rather than paying a second round trip after it
+    versions, issues = await asyncio.gather(
+        async_db.get_data_versions('issues'),
+        async_db.get_user_issue_index(session['user_id']))
+    not_modified = check_not_modified(versions, session['user_id'])
+    if not_modified:
+        return not_modified
     
     # Calculate statistics for student dashboard
     total_issues = len(issues)
@@ -226,19 +336,22 @@ def student_dashboard():
         'resolved': resolved
     }
     
-    return render_template('student_dashboard.html', issues=issues, stats=stats)
+    return with_validators(render_template('student_dashboard.html', issues=issues, stats=stats))
 
 @app.route('/admin-dashboard')
-def admin_dashboard():
+async def admin_dashboard():
     if 'user_role' not in session or session['user_role'] != 'supa_admin':
         flash('Access denied.', 'danger')
         return redirect(url_for('login'))
 
-    # Get statistics
-    stats = firebase_db.get_statistics()
-    
-    # Get all users for user statistics
-    all_users = firebase_db.get_all_users()
+    versions = await async_db.get_data_versions('issues', 'users')
+    not_modified = check_not_modified(versions, session['user_id'])
+    if not_modified:
+        return not_modified
+
+    # One concurrent download of each tree; every statistic is derived from them
+    users_data, all_issues = await asyncio.gather(async_db.get_users(), async_db.get_issues())
+    all_users = list(users_data.values())
     
     # Calculate user statistics
     total_users = len(all_users)
@@ -253,17 +366,20 @@ def admin_dashboard():
         'verified_users': verified_users
     }
     
-    # Get all issues for enhanced statistics
-    all_issues = firebase_db.get_issues()
-    
     # Calculate enhanced stats
-    stats['total'] = len(all_issues)
-    stats['pending'] = len([i for i in all_issues if i.get('status') == 'pending'])
-    stats['in_progress'] = len([i for i in all_issues if i.get('status') == 'in_progress'])
-    stats['resolved'] = len([i for i in all_issues if i.get('status') == 'resolved'])
+    pending = len([i for i in all_issues if i.get('status') == 'pending'])
+    stats = {
+        'total_users': total_users,
+        'total_issues': len(all_issues),
+        'pending_issues': pending,
+        'total': len(all_issues),
+        'pending': pending,
+        'in_progress': len([i for i in all_issues if i.get('status') == 'in_progress']),
+        'resolved': len([i for i in all_issues if i.get('status') == 'resolved'])
+    }
 
-    # Get recent issues with user info
-    issues = firebase_db.get_issues_with_user_info(limit=20)
+    # Recent issues with user info, filled from the users already loaded
+    issues = attach_user_info([dict(issue) for issue in all_issues[:20]], users_data)
     
     # Mock data for charts (you can enhance this with real data later)
     daily_stats = []
@@ -271,14 +387,15 @@ def admin_dashboard():
     recent_activities = []
     notifications = []
 
-    return render_template('admin_dashboard.html', 
+    return with_validators(render_template('admin_dashboard.html', 
+                         versions=versions,
                          stats=stats, 
                          user_stats=user_stats,
                          issues=issues,
                          daily_stats=daily_stats,
                          category_stats=category_stats,
                          recent_activities=recent_activities,
-                         notifications=notifications)
+                         notifications=notifications))
 
 @app.route('/admin/manage-users')
 def admin_manage_users():
@@ -343,24 +460,27 @@ def view_all_activities():
     return render_template('admin_activities.html', activities=activities)
 
 @app.route('/subadmin-dashboard')
-def subadmin_dashboard():
+async def subadmin_dashboard():
     if 'user_role' not in session or session['user_role'] not in ['subadmin', 'supa_admin']:
         flash('Access denied.', 'danger')
         return redirect(url_for('login'))
 
-    issues = firebase_db.get_issues_with_user_info()
-    
-    # Calculate statistics for subadmin dashboard
-    total_issues = len(issues)
-    pending_issues = len([i for i in issues if i.get('status') == 'pending'])
-    in_progress_issues = len([i for i in issues if i.get('status') == 'in_progress'])
-    resolved_issues = len([i for i in issues if i.get('status') == 'resolved'])
-    
+    versions = await async_db.get_data_versions('issues', 'users', 'categories')
+    not_modified = check_not_modified(versions, session['user_id'], session['user_role'])
+    if not_modified:
+        return not_modified
+
+    # Only counts are rendered, read from the counters every issue write keeps;
+    # the issue tables page through /api/issues
+    firebase_db.ensure_status_counts()
+    firebase_db.ensure_category_index()
+    status_counts, category_counts, categories = await async_db.get_issue_counts()
+
     stats = {
-        'total_issues': total_issues,
-        'pending': pending_issues,
-        'in_progress': in_progress_issues,
-        'resolved': resolved_issues
+        'total_issues': sum(status_counts.values()),
+        'pending': status_counts.get('pending', 0),
+        'in_progress': status_counts.get('in_progress', 0),
+        'resolved': status_counts.get('resolved', 0)
     }
     
     # Get current user info
@@ -370,31 +490,128 @@ def subadmin_dashboard():
         'role': session.get('user_role', 'subadmin')
     }
     
-    # Get category statistics
-    category_stats = {}
-    for issue in issues:
-        category = issue.get('category', 'Other')
-        category_stats[category] = category_stats.get(category, 0) + 1
+    # Category statistics; counts are keyed by normalized name, so show the configured name
+    names = {category_key(c.get('name')): c['name'] for c in categories.values() if c.get('name')}
+    category_list = [{'category': names.get(key, unquote(key)), 'count': count}
+                     for key, count in category_counts.items() if count > 0]
     
-    category_list = [{'category': k, 'count': v} for k, v in category_stats.items()]
-    
-    # Ensure all issues have required fields and fix data structure
-    processed_issues = []
-    for issue in issues:
-        processed_issue = dict(issue)
-        # Ensure title field exists for template compatibility
-        if 'title' not in processed_issue and 'subject' in processed_issue:
-            processed_issue['title'] = processed_issue['subject']
-        elif 'subject' not in processed_issue and 'title' in processed_issue:
-            processed_issue['subject'] = processed_issue['title']
-        processed_issues.append(processed_issue)
-    
-    return render_template('subadmin_dashboard.html', 
-                         issues=processed_issues, 
+    return with_validators(render_template('subadmin_dashboard.html', 
+                         versions=versions,
                          stats=stats, 
                          current_user=current_user,
-                         recent_issues=processed_issues[:10],
-                         category_stats=category_list)
+                         category_stats=category_list))
+
+@app.route('/api/issues')
+def api_issues():
+    if 'user_role' not in session or session['user_role'] not in ['subadmin', 'supa_admin']:
+        return {'error': 'Access denied'}, 403
+
+    try:
+        filters = parse_issue_filters(request.args)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    fields = parse_fields(request.args.get('fields'))
+
+    user_id = None
+    student = filters.pop('student')
+    if student:
+        if '@' in student:
+            user = firebase_db.get_user_by_email(student.lower())
+            if not user:
+                return jsonify({'issues': [], 'next_cursor': None})
+            user_id = user['id']
+        else:
+            user_id = student
+
+    issues, next_cursor = firebase_db.query_issues(user_id=user_id, **filters)
+    return jsonify({
+        'issues': [serialize_issue(issue, fields) for issue in issues],
+        'next_cursor': encode_cursor(next_cursor)
+    })
+
+# Roles issues can be assigned to
+ASSIGNEE_ROLES = ('subadmin', 'supa_admin')
+
+@app.route('/admin/assignees')
+async def assignees():
+    """Staff that issues can be assigned to, for the bulk action menu"""
+    if 'user_role' not in session or session['user_role'] not in ['subadmin', 'supa_admin']:
+        return {'error': 'Access denied'}, 403
+    users = await async_db.get_users_by_role(*ASSIGNEE_ROLES)
+    users.sort(key=lambda user: user.get('full_name', ''))
+    return jsonify({'assignees': [{'id': user['id'], 'name': user.get('full_name') or user.get('email', '')}
+                                  for user in users if user.get('is_active', True)]})
+
+@app.route('/admin/issues/bulk', methods=['POST'])
+async def bulk_issue_action():
+    """Change the status, response or assignee of many issues, or delete them, in one write"""
+    if 'user_role' not in session or session['user_role'] not in ['subadmin', 'supa_admin']:
+        return {'error': 'Access denied'}, 403
+
+    try:
+        bulk = parse_bulk_action(request.get_json(silent=True) or request.form)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    # Every selected issue is read at once; derived data needs each one's student and category
+    reads = [async_db.get_issue(issue_id) for issue_id in bulk['ids']]
+    if bulk['action'] == 'assign' and bulk['assignee']:
+        reads.append(async_db.get_user(bulk['assignee']))
+    results = await asyncio.gather(*reads)
+    issues = {issue.pop('id'): issue for issue in results[:len(bulk['ids'])] if issue}
+    missing = [issue_id for issue_id in bulk['ids'] if issue_id not in issues]
+
+    now = datetime.now().isoformat()
+    if bulk['action'] == 'delete':
+        data = None
+    elif bulk['action'] == 'status':
+        data = {'status': bulk['status'], 'updated_at': now}
+        if bulk['response']:
+            data['admin_response'] = bulk['response']
+    elif bulk['action'] == 'respond':
+        data = {'admin_response': bulk['response'], 'updated_at': now}
+    else:
+        assignee = results[-1] if bulk['assignee'] else None
+        if bulk['assignee'] and (not assignee or assignee.get('role') not in ASSIGNEE_ROLES):
+            return {'error': 'Issues can only be assigned to sub-admins and admins'}, 400
+        data = {
+            'assigned_to': bulk['assignee'],
+            'assigned_name': assignee.get('full_name') if assignee else None,
+            'updated_at': now
+        }
+
+    if issues:
+        if data is None:
+            success = firebase_db.bulk_delete_issues(issues)
+        else:
+            success = firebase_db.bulk_update_issues(issues, data)
+        if not success:
+            return {'error': 'The issues could not be updated'}, 500
+
+    return jsonify({'action': bulk['action'], 'updated': list(issues), 'missing': missing})
+
+@app.route('/admin/events')
+def issue_events():
+    """Server-sent issue events that keep open dashboards current without reloading"""
+    if 'user_role' not in session or session['user_role'] not in ['subadmin', 'supa_admin']:
+        return {'error': 'Access denied'}, 403
+    return event_stream_response(firebase_issue_listener)
+
+@app.route('/admin/search')
+def search_issues():
+    if 'user_role' not in session or session['user_role'] not in ['subadmin', 'supa_admin']:
+        return {'error': 'Access denied'}, 403
+
+    try:
+        results = firebase_db.ensure_search_index().search(request.args.get('q', ''),
+                                                           page=request.args.get('page', 1, type=int),
+                                                           per_page=request.args.get('per_page', 20, type=int),
+                                                           status=request.args.get('status') or None,
+                                                           category=request.args.get('category') or None)
+    except Exception as e:
+        print(f"Error searching issues: {e}")
+        return {'error': 'Search is unavailable'}, 503
+    return jsonify(results)
 
 @app.route('/submit-issue', methods=['GET', 'POST'])
 def submit_issue():
@@ -448,6 +665,12 @@ def submit_issue():
             'created_at': datetime.now().isoformat()
         }
 
+        # Snapshot the student's display fields so admin lists need no user reads
+        student = firebase_db.get_user(session['user_id']) or {}
+        issue_data['full_name'] = student.get('full_name', session.get('user_name', 'Unknown'))
+        issue_data['email'] = student.get('email', session.get('user_email', 'Unknown'))
+        issue_data['index_number'] = student.get('index_number', 'N/A')
+
         issue_id = firebase_db.add_issue(issue_data)
 
         if issue_id:
@@ -459,43 +682,31 @@ def submit_issue():
     return render_template('submit_issue.html', categories=active_categories)
 
 @app.route('/verify-email', methods=['GET', 'POST'])
-def verify_email():
+async def verify_email():
     if request.method == 'POST':
         email = request.form['email'].strip().lower()
         verification_code = request.form['verification_code'].strip()
         
         try:
-            # Find verification record
-            verifications_ref = firebase_db.db_ref.child('email_verifications')
-            verifications_data = verifications_ref.get() or {}
+            # Single-path read of the verification stored for this email
+            verification = await async_db.get_email_verification(email)
             
             valid_verification = None
-            verification_key = None
-            
-            for key, verification in verifications_data.items():
-                if (verification.get('email') == email and 
-                    verification.get('code') == verification_code):
-                    
-                    # Check if not expired
-                    expires_at = datetime.fromisoformat(verification.get('expires_at', ''))
-                    if datetime.now() < expires_at:
-                        valid_verification = verification
-                        verification_key = key
-                        break
+            if verification and hmac.compare_digest(
+                    str(verification.get('code', '')).encode('utf-8'),
+                    verification_code.encode('utf-8')):
+                # Check if not expired
+                expires_at = datetime.fromisoformat(verification.get('expires_at', ''))
+                if datetime.now() < expires_at:
+                    valid_verification = verification
             
             if valid_verification:
-                # Update user as verified
-                user_id = valid_verification['user_id']
-                firebase_db.update_user(user_id, {
-                    'is_verified': True,
-                    'verified_at': datetime.now().isoformat()
-                })
-                
-                # Delete verification record
-                verifications_ref.child(verification_key).delete()
-                
-                flash('Email verified successfully! You can now login.', 'success')
-                return redirect(url_for('login'))
+                # Mark the user verified and delete the verification record in one write
+                if await async_db.mark_email_verified(valid_verification['user_id'], valid_verification['id'],
+                                                      datetime.now().isoformat()):
+                    flash('Email verified successfully! You can now login.', 'success')
+                    return redirect(url_for('login'))
+                flash('Verification failed. Please try again.', 'danger')
             else:
                 flash('Invalid or expired verification code.', 'danger')
         
@@ -567,7 +778,7 @@ def create_subadmin():
 
         user_data = {
             'email': email,
-            'password': generate_password_hash(password),
+            'password': hash_password(password),
             'full_name': full_name,
             'role': 'subadmin',
             'is_verified': True,
@@ -610,16 +821,27 @@ def admin_resolve_issue(issue_id):
     return redirect(url_for('subadmin_dashboard'))
 
 @app.route('/admin/issue/<issue_id>')
-def get_issue_details(issue_id):
+async def get_issue_details(issue_id):
     if 'user_role' not in session or session['user_role'] not in ['subadmin', 'supa_admin']:
         return {'error': 'Access denied'}, 403
 
     try:
-        issues = firebase_db.get_issues_with_user_info()
-        issue = next((i for i in issues if i.get('id') == issue_id), None)
+        # The issue is read alongside the versions instead of after them
+        versions, issue = await asyncio.gather(async_db.get_data_versions('issues', 'users'),
+                                               async_db.get_issue(issue_id))
+        not_modified = check_not_modified(versions)
+        if not_modified:
+            return not_modified
         
         if issue:
-            return {
+            if 'full_name' not in issue and issue.get('user_id'):
+                # Issue predates the student snapshot written by submit_issue
+                user = await async_db.get_user(issue['user_id']) or {}
+                issue['full_name'] = user.get('full_name', 'Unknown User')
+                issue['email'] = user.get('email', 'Unknown')
+                issue['index_number'] = user.get('index_number', 'N/A')
+
+            response = jsonify({
                 'id': issue.get('id'),
                 'full_name': issue.get('full_name', ''),
                 'email': issue.get('email', ''),
@@ -630,7 +852,9 @@ def get_issue_details(issue_id):
                 'message': issue.get('description', ''),
                 'response': issue.get('admin_response', ''),
                 'created_at': issue.get('created_at', '')
-            }
+            })
+            # Lets the admin modal re-open an unchanged issue with a bodiless 304
+            return with_validators(response)
         else:
             return {'error': 'Issue not found'}, 404
     except Exception as e:
@@ -673,7 +897,7 @@ def my_issues():
         flash('Please login first.', 'danger')
         return redirect(url_for('login'))
 
-    issues = firebase_db.get_issues(user_id=session['user_id'])
+    issues = firebase_db.get_user_issue_index(session['user_id'])
     return render_template('my_issues.html', issues=issues)
 
 @app.route('/system-settings', methods=['GET', 'POST'])
@@ -878,6 +1102,62 @@ def toggle_prefix(prefix_id):
     
     return redirect(url_for('manage_prefixes'))
 
+# Row errors sent back in the final report; the count is always exact
+MAX_REPORTED_IMPORT_ERRORS = 1000
+
+@app.route('/admin/import-students', methods=['GET', 'POST'])
+def import_students_csv():
+    """Create student accounts from an uploaded CSV, streaming progress as NDJSON lines"""
+    if 'user_role' not in session or session['user_role'] != 'supa_admin':
+        if request.method == 'POST':
+            return {'error': 'Access denied'}, 403
+        flash('Access denied. Admin only.', 'danger')
+        return redirect(url_for('login'))
+
+    if request.method == 'GET':
+        return render_template('import_students.html', prefixes=firebase_db.get_active_prefixes())
+
+    if serves_one_request_at_a_time():
+        # Hashing a large file outlasts GUNICORN_TIMEOUT, and the worker would be killed mid-import
+        return {'error': 'Importing needs gthread or gevent workers; use python student_import.py instead'}, 503
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return {'error': 'Choose a CSV file to import'}, 400
+    dry_run = request.form.get('dry_run') in ('1', 'true', 'on')
+
+    # The upload is decoded and parsed as it is read, never held as one string
+    emails, index_numbers = existing_accounts(firebase_db)
+    try:
+        students, errors = read_students(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''),
+                                         firebase_db.get_active_prefixes(), emails, index_numbers)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return {'error': f'Could not read the file as UTF-8 CSV: {e}'}, 400
+
+    def report():
+        yield json.dumps({'stage': 'validated', 'valid': len(students), 'rejected': len(errors)}) + '\n'
+        created = failed = 0
+        if students and not dry_run:
+            for progress in import_students(firebase_db, students):
+                created, failed = progress['created'], progress['failed']
+                errors.extend(progress['errors'])
+                yield json.dumps({'stage': 'writing', 'created': created, 'failed': failed,
+                                  'total': progress['total']}) + '\n'
+        errors.sort(key=lambda error: error['line'])
+        yield json.dumps({
+            'stage': 'done',
+            'dry_run': dry_run,
+            'created': created,
+            'failed': failed,
+            'error_count': len(errors),
+            'errors': errors[:MAX_REPORTED_IMPORT_ERRORS],
+            'credentials': generated_credentials(students)
+        }) + '\n'
+
+    # Each line is flushed as it is produced so the page can show progress
+    return Response(report(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
 @app.route('/admin/manage-categories')
 def manage_categories():
     if 'user_role' not in session or session['user_role'] != 'supa_admin':
@@ -885,23 +1165,14 @@ def manage_categories():
         return redirect(url_for('login'))
 
     try:
-        categories_ref = firebase_db.db_ref.child('issue_categories')
-        categories_data = categories_ref.get() or {}
+        categories_data = firebase_db.db_ref.child('issue_categories').get() or {}
+        category_counts = firebase_db.get_category_counts()
         categories = []
-        
-        # Get issue counts for each category
-        issues_ref = firebase_db.db_ref.child('issues')
-        issues_data = issues_ref.get() or {}
-        
-        category_counts = {}
-        for issue_id, issue in issues_data.items():
-            category = issue.get('category', 'Other')
-            category_counts[category] = category_counts.get(category, 0) + 1
-        
+
         for key, value in categories_data.items():
             category = value
             category['id'] = key
-            category['issue_count'] = category_counts.get(category.get('name', ''), 0)
+            category['issue_count'] = category_counts.get(category_key(category.get('name', '')), 0)
             categories.append(category)
         
         categories.sort(key=lambda x: x.get('name', ''))
@@ -922,17 +1193,7 @@ def add_category():
     
     if name:
         try:
-            # Check if category already exists
-            categories_ref = firebase_db.db_ref.child('issue_categories')
-            categories_data = categories_ref.get() or {}
-            
-            category_exists = False
-            for key, value in categories_data.items():
-                if value.get('name', '').lower() == name.lower():
-                    category_exists = True
-                    break
-            
-            if category_exists:
+            if firebase_db.find_category_by_name(name):
                 flash('Category already exists.', 'danger')
             else:
                 category_data = {
@@ -941,8 +1202,10 @@ def add_category():
                     'is_active': True,
                     'created_at': datetime.now().isoformat()
                 }
-                categories_ref.push(category_data)
-                flash('Category added successfully!', 'success')
+                if firebase_db.add_category(category_data):
+                    flash('Category added successfully!', 'success')
+                else:
+                    flash('Failed to add category.', 'danger')
         except Exception as e:
             flash('Failed to add category.', 'danger')
             print(f"Error adding category: {e}")
@@ -962,19 +1225,23 @@ def edit_category(category_id):
     
     if name:
         try:
-            category_ref = firebase_db.db_ref.child('issue_categories').child(category_id)
-            category_data = category_ref.get()
-            
-            if category_data:
+            category_data = firebase_db.db_ref.child('issue_categories').child(category_id).get()
+            existing_id = firebase_db.find_category_by_name(name)
+
+            if not category_data:
+                flash('Category not found.', 'danger')
+            elif existing_id and existing_id != category_id:
+                flash('Category already exists.', 'danger')
+            else:
                 update_data = {
                     'name': name,
                     'description': description,
                     'updated_at': datetime.now().isoformat()
                 }
-                category_ref.update(update_data)
-                flash('Category updated successfully!', 'success')
-            else:
-                flash('Category not found.', 'danger')
+                if firebase_db.update_category(category_id, category_data.get('name', ''), update_data):
+                    flash('Category updated successfully!', 'success')
+                else:
+                    flash('Failed to update category.', 'danger')
         except Exception as e:
             flash('Failed to update category.', 'danger')
             print(f"Error updating category: {e}")
@@ -995,20 +1262,12 @@ def delete_category(category_id):
         
         if category_data:
             # Check if category is being used
-            issues_ref = firebase_db.db_ref.child('issues')
-            issues_data = issues_ref.get() or {}
-            
-            category_in_use = False
-            for issue_id, issue in issues_data.items():
-                if issue.get('category') == category_data.get('name'):
-                    category_in_use = True
-                    break
-            
-            if category_in_use:
+            if firebase_db.get_category_count(category_data.get('name', '')) > 0:
                 flash('Cannot delete category. It is being used by existing issues.', 'warning')
-            else:
-                category_ref.delete()
+            elif firebase_db.delete_category(category_id, category_data.get('name', '')):
                 flash('Category deleted successfully!', 'success')
+            else:
+                flash('Failed to delete category.', 'danger')
         else:
             flash('Category not found.', 'danger')
     except Exception as e:
@@ -1029,12 +1288,14 @@ def toggle_category(category_id):
         
         if category_data:
             new_status = not category_data.get('is_active', True)
-            category_ref.update({
+            if firebase_db.update_category(category_id, category_data.get('name', ''), {
                 'is_active': new_status,
                 'updated_at': datetime.now().isoformat()
-            })
-            status_text = 'activated' if new_status else 'deactivated'
-            flash(f'Category {status_text} successfully!', 'success')
+            }):
+                status_text = 'activated' if new_status else 'deactivated'
+                flash(f'Category {status_text} successfully!', 'success')
+            else:
+                flash('Failed to update category status.', 'danger')
         else:
             flash('Category not found.', 'danger')
     except Exception as e:
@@ -1054,13 +1315,10 @@ def delete_user(user_id):
         flash('Cannot delete your own account.', 'danger')
         return redirect(url_for('manage_users'))
 
-    try:
-        user_ref = firebase_db.db_ref.child('users').child(user_id)
-        user_ref.delete()
+    if firebase_db.delete_user(user_id):
         flash('User deleted successfully!', 'success')
-    except Exception as e:
+    else:
         flash('Failed to delete user.', 'danger')
-        print(f"Error deleting user: {e}")
     
     return redirect(url_for('manage_users'))
 
@@ -1099,9 +1357,10 @@ def delete_subadmin(user_id):
     try:
         user = firebase_db.get_user_by_id(user_id)
         if user and user.get('role') == 'subadmin':
-            user_ref = firebase_db.db_ref.child('users').child(user_id)
-            user_ref.delete()
-            flash('Sub-admin deleted successfully!', 'success')
+            if firebase_db.delete_user(user_id):
+                flash('Sub-admin deleted successfully!', 'success')
+            else:
+                flash('Failed to delete sub-admin.', 'danger')
         else:
             flash('Sub-admin not found.', 'danger')
     except Exception as e:
@@ -1263,6 +1522,20 @@ def admin_analytics():
                          peak_hours=peak_hours,
                          category_trends=category_trends)
 
+@app.route('/admin/api/login-throttle')
+def login_throttle_stats():
+    if 'user_role' not in session or session['user_role'] != 'supa_admin':
+        return {'error': 'Access denied'}, 403
+
+    return login_throttle.get_counters()
+
+@app.route('/admin/api/email-failures')
+def email_failures():
+    if 'user_role' not in session or session['user_role'] != 'supa_admin':
+        return {'error': 'Access denied'}, 403
+
+    return jsonify(firebase_db.get_email_failures())
+
 @app.route('/logout')
 def logout():
     session.clear()
@@ -1270,8 +1543,16 @@ def logout():
     return redirect(url_for('login'))
 
 if __name__ == '__main__':
+    create_app({'DEBUG': os.environ.get('FLASK_DEBUG') == '1'})
+    import_ms = (time.perf_counter() - _import_started) * 1000
     print("Initializing Firebase Realtime Database...")
+    seed_started = time.perf_counter()
     init_default_users()
+    seed_ms = (time.perf_counter() - seed_started) * 1000
+    from sweeper import start_sweeper
+    start_sweeper(firebase_db)
     print("Firebase Student Report System initialized successfully!")
-    print("Server will be available at: http://0.0.0.0:5000")
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    print(f"Cold start: {import_ms + seed_ms:.0f} ms (import and setup {import_ms:.0f} ms, seeding check {seed_ms:.0f} ms)")
+    port = int(os.environ.get('PORT', 5000))
+    print(f"Server will be available at: http://0.0.0.0:{port}")
+    app.run(host='0.0.0.0', port=port, debug=app.debug)
@@ -0,0 +1,19 @@
+"""Production WSGI entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) this module is imported once in the
+gunicorn master. Everything loaded here is then shared copy-on-write by the
+workers, and gc.freeze() moves it out of the cyclic collector's reach so a
+worker's collections don't write to those pages and un-share them.
+"""
+import gc
+import os
+
+from working_app import create_app, warm_shared_state
+
+app = create_app({
+    'SECRET_KEY': os.environ.get('FLASK_SECRET_KEY', 'student-report-system-firebase-secret-key')
+})
+warm_shared_state()
+
+gc.collect()
+gc.freeze()